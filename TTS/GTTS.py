@@ -4,16 +4,29 @@ from gtts import gTTS
 
 from utils import settings
 
+# the accents of Google Translate are picked by the top level domain it is reached through
+voices = [
+    "com",
+    "co.uk",
+    "com.au",
+    "ca",
+    "co.in",
+    "ie",
+    "co.za",
+]
+
 
 class GTTS:
     def __init__(self):
         self.max_chars = 5000
-        self.voices = []
+        self.max_workers = settings.config["settings"]["tts"].get("gtts_max_workers", 4)
+        self.voices = voices
 
-    def run(self, text, filepath):
+    def run(self, text, filepath, random_voice: bool = False):
         tts = gTTS(
             text=text,
             lang=settings.config["reddit"]["thread"]["post_lang"] or "en",
+            tld=self.randomvoice() if random_voice else "com",
             slow=False,
         )
         tts.save(filepath)
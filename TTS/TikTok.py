@@ -1,14 +1,19 @@
 # documentation for tiktok api: https://github.com/oscie57/tiktok-voice/wiki
+import asyncio
 import base64
 import random
 import time
 from typing import Optional, Final
 
+import aiohttp
 import requests
 
+from TTS.async_wrapper import PooledHTTPMixin
 from utils import settings
+from utils.credentials import CredentialRejected, get_credential_pool, parse_credentials
+from utils.ratelimit import RateLimitExceeded
 
-__all__ = ["TikTok", "TikTokTTSException"]
+__all__ = ["TikTok", "AsyncTikTok", "TikTokTTSException"]
 
 disney_voices: Final[tuple] = (
     "en_us_ghostface",  # Ghost Face
@@ -79,30 +84,47 @@ vocals: Final[tuple] = (
 class TikTok:
     """TikTok Text-to-Speech Wrapper"""
 
-    def __init__(self):
-        headers = {
+    def __init__(
+        self,
+        uri_base: str = "https://api16-normal-c-useast1a.tiktokv.com/media/api/text/speech/invoke/",
+    ):
+        self.headers = {
             "User-Agent": "com.zhiliaoapp.musically/2022600030 (Linux; U; Android 7.1.2; es_ES; SM-G988N; "
             "Build/NRD90M;tt-ok/3.12.13.1)",
-            "Cookie": f"sessionid={settings.config['settings']['tts']['tiktok_sessionid']}",
         }
 
-        self.URI_BASE = "https://api16-normal-c-useast1a.tiktokv.com/media/api/text/speech/invoke/"
+        self.URI_BASE = uri_base
         self.max_chars = 200
+        self.max_workers = settings.config["settings"]["tts"].get("tiktok_max_workers", 4)
+        self.retries = 3
+        # every sessionid has its own rate limiter, requests are spread over them
+        self.sessions = get_credential_pool(
+            "TikTok",
+            parse_credentials(settings.config["settings"]["tts"]["tiktok_sessionid"]),
+            strategy=settings.config["settings"]["tts"].get("credential_strategy", "round_robin"),
+            burst=self.max_workers,
+        )
 
         self._session = requests.Session()
         # set the headers to the session, so we don't have to do it for every request
-        self._session.headers = headers
+        self._session.headers = self.headers
 
     def run(self, text: str, filepath: str, random_voice: bool = False):
-        if random_voice:
-            voice = self.random_voice()
-        else:
-            # if tiktok_voice is not set in the config file, then use a random voice
-            voice = settings.config["settings"]["tts"].get("tiktok_voice", None)
+        voice = self.get_voice(random_voice)
 
         # get the audio from the TikTok API
         data = self.get_voices(voice=voice, text=text)
 
+        self.save(data, filepath)
+
+    def get_voice(self, random_voice: bool = False) -> Optional[str]:
+        if random_voice:
+            return self.random_voice()
+        # if tiktok_voice is not set in the config file, then use a random voice
+        return settings.config["settings"]["tts"].get("tiktok_voice", None)
+
+    @staticmethod
+    def save(data: dict, filepath: str):
         # check if there was an error in the request
         status_code = data["status_code"]
         if status_code != 0:
@@ -122,8 +144,8 @@ class TikTok:
         with open(filepath, "wb") as out:
             out.write(decoded_voices)
 
-    def get_voices(self, text: str, voice: Optional[str] = None) -> dict:
-        """If voice is not passed, the API will try to use the most fitting voice"""
+    @staticmethod
+    def get_params(text: str, voice: Optional[str] = None) -> dict:
         # sanitize text
         text = text.replace("+", "plus").replace("&", "and").replace("r/", "")
 
@@ -132,21 +154,84 @@ class TikTok:
 
         if voice is not None:
             params["text_speaker"] = voice
+        return params
 
-        # send request
-        try:
-            response = self._session.post(self.URI_BASE, params=params)
-        except ConnectionError:
-            time.sleep(random.randrange(1, 7))
-            response = self._session.post(self.URI_BASE, params=params)
+    def get_voices(self, text: str, voice: Optional[str] = None) -> dict:
+        """If voice is not passed, the API will try to use the most fitting voice"""
+        params = self.get_params(text, voice)
+
+        # send request, retrying dropped connections and moving on from rejected sessionids
+        attempt = 0
+        while True:
+            try:
+                with self.sessions.use() as account:
+                    response = account.rate_limiter.request(
+                        lambda: self._session.post(
+                            self.URI_BASE, params=params, headers=self.cookie(account.value)
+                        )
+                    )
+                    self.check_session(response.status_code)
+                return response.json()
+            except requests.exceptions.ConnectionError:
+                attempt += 1
+                if attempt == self.retries:
+                    raise
+                time.sleep(random.uniform(1, 2**attempt * 3))
+            except (CredentialRejected, RateLimitExceeded):
+                continue  # quarantined by the pool, try the next sessionid
+
+    @staticmethod
+    def cookie(sessionid: str) -> dict:
+        return {"Cookie": f"sessionid={sessionid}"}
 
-        return response.json()
+    @staticmethod
+    def check_session(status: int):
+        if status in (401, 403):
+            raise CredentialRejected(f"the sessionid was refused with HTTP {status}")
 
     @staticmethod
     def random_voice() -> str:
         return random.choice(eng_voices)
 
 
+class AsyncTikTok(PooledHTTPMixin, TikTok):
+    """TikTok Text-to-Speech Wrapper with an async run, see TTS/async_wrapper.py"""
+
+    provider_name = "TikTok"
+
+    async def run(self, text: str, filepath: str, random_voice: bool = False):
+        voice = self.get_voice(random_voice)
+        data = await self.get_voices_async(voice=voice, text=text)
+        self.save(data, filepath)
+
+    async def get_voices_async(self, text: str, voice: Optional[str] = None) -> dict:
+        params = self.get_params(text, voice)
+        http = await self.http()
+        attempt = 0
+        while True:
+            try:
+                with self.sessions.use() as account:
+                    return await account.rate_limiter.request_async(
+                        lambda: self.post(http, params, account.value)
+                    )
+            except aiohttp.ClientConnectionError:
+                attempt += 1
+                if attempt == self.retries:
+                    raise
+                await asyncio.sleep(random.uniform(1, 2**attempt * 3))
+            except (CredentialRejected, RateLimitExceeded):
+                continue  # quarantined by the pool, try the next sessionid
+
+    async def post(self, http: aiohttp.ClientSession, params: dict, sessionid: str):
+        async with http.post(
+            self.URI_BASE, params=params, headers=self.cookie(sessionid)
+        ) as response:
+            self.check_session(response.status)
+            if response.status == 429:
+                return response.status, response.headers, None
+            return response.status, response.headers, await response.json(content_type=None)
+
+
 class TikTokTTSException(Exception):
     def __init__(self, code: int, message: str):
         self._code = code
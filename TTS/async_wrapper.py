@@ -0,0 +1,91 @@
+import asyncio
+import atexit
+import threading
+from typing import Optional, Set
+
+import aiohttp
+
+__all__ = ["AsyncTTSAdapter", "PooledHTTPMixin"]
+
+_loop: Optional[asyncio.AbstractEventLoop] = None
+_loop_lock = threading.Lock()
+# the provider classes that have an open session, closed at exit
+_pooled: Set[type] = set()
+
+
+def get_event_loop() -> asyncio.AbstractEventLoop:
+    """Returns the event loop shared by every async TTS provider, starting it on first use.
+
+    The loop runs forever in a daemon thread, so the connection pools of the providers stay alive
+    between clips, threads and runs. They are closed when the program exits.
+    """
+    global _loop
+    with _loop_lock:
+        if _loop is None:
+            _loop = asyncio.new_event_loop()
+            threading.Thread(target=_loop.run_forever, name="AsyncTTS", daemon=True).start()
+            atexit.register(close_sessions)
+    return _loop
+
+
+def close_sessions():
+    """Closes the sessions of every async provider on the shared event loop"""
+    for cls in list(_pooled):
+        asyncio.run_coroutine_threadsafe(cls.close(), _loop).result(timeout=5)
+
+
+class PooledHTTPMixin:
+    """One keep-alive aiohttp session shared by every instance of an async provider.
+
+    The provider needs the headers and max_workers attributes. The session is opened on the shared
+    event loop on first use and closed by close() or when the program exits.
+    """
+
+    _http: Optional[aiohttp.ClientSession] = None
+
+    async def http(self) -> aiohttp.ClientSession:
+        cls = type(self)
+        if cls._http is None or cls._http.closed:
+            cls._http = aiohttp.ClientSession(
+                headers=self.headers,
+                connector=aiohttp.TCPConnector(limit=self.max_workers, keepalive_timeout=60),
+            )
+            _pooled.add(cls)
+        return cls._http
+
+    @classmethod
+    async def close(cls):
+        if cls._http is not None:
+            await cls._http.close()
+            cls._http = None
+        _pooled.discard(cls)
+
+
+class AsyncTTSAdapter:
+    """Lets TTSEngine use a provider with an async run.
+
+    Every call to run is scheduled on the shared event loop, so the worker threads of TTSEngine
+    only wait for their clip while all the requests go through the provider's connection pool.
+
+    Args:
+        async_module : The async TTS module. It must have async run(text, filepath, random_voice)
+                       and async close(), from PooledHTTPMixin, plus the max_chars and
+                       max_workers attributes.
+    """
+
+    def __init__(self, async_module):
+        self.loop = get_event_loop()
+        self.tts_module = async_module()
+        self.provider_name = getattr(
+            self.tts_module, "provider_name", type(self.tts_module).__name__
+        )
+        self.max_chars = self.tts_module.max_chars
+        self.max_workers = getattr(self.tts_module, "max_workers", 1)
+
+    def run(self, text: str, filepath: str, random_voice: bool = False):
+        return asyncio.run_coroutine_threadsafe(
+            self.tts_module.run(text, filepath, random_voice), self.loop
+        ).result()
+
+    def close(self):
+        asyncio.run_coroutine_threadsafe(self.tts_module.close(), self.loop).result()
@@ -1,10 +1,16 @@
 import random
-import sys
+import threading
+import time
+from typing import Optional
 
 from boto3 import Session
+from botocore.config import Config
 from botocore.exceptions import BotoCoreError, ClientError, ProfileNotFound
 
 from utils import settings
+from utils.ratelimit import get_rate_limiter
+
+__all__ = ["AWSPolly", "AWSPollyException"]
 
 voices = [
     "Brian",
@@ -24,54 +30,103 @@ voices = [
     "Raveena",
 ]
 
+throttling_errors = (
+    "ThrottlingException",
+    "TooManyRequestsException",
+    "ServiceUnavailableException",
+)
+
+# boto3 clients are thread safe, so one per endpoint is shared by the whole process
+_clients = {}
+_clients_lock = threading.Lock()
+
+
+def get_client(endpoint_url: Optional[str] = None, max_pool_connections: int = 10):
+    """Returns the Polly client of an endpoint, shared by the whole process.
+
+    The credentials come from the "polly" profile of the AWS CLI. A client for an endpoint_url,
+    like a local stand-in of the API, falls back to dummy credentials when there is no such profile.
+    """
+    with _clients_lock:
+        if endpoint_url not in _clients:
+            try:
+                session = Session(profile_name="polly")
+            except ProfileNotFound:
+                if endpoint_url is None:
+                    print("You need to install the AWS CLI and configure your profile")
+                    print("""
+            Linux: https://docs.aws.amazon.com/polly/latest/dg/setup-aws-cli.html
+            Windows: https://docs.aws.amazon.com/polly/latest/dg/install-voice-plugin2.html
+            """)
+                    raise
+                session = Session(
+                    aws_access_key_id="standin",
+                    aws_secret_access_key="standin",
+                    region_name="us-east-1",
+                )
+            _clients[endpoint_url] = session.client(
+                "polly",
+                endpoint_url=endpoint_url,
+                config=Config(
+                    max_pool_connections=max_pool_connections,
+                    retries={"max_attempts": 3, "mode": "standard"},
+                ),
+            )
+        return _clients[endpoint_url]
+
 
 class AWSPolly:
-    def __init__(self):
+    def __init__(self, endpoint_url: Optional[str] = None):
         self.max_chars = 3000
+        self.max_workers = settings.config["settings"]["tts"].get("aws_polly_max_workers", 8)
         self.voices = voices
+        self.endpoint_url = endpoint_url
+        self.rate_limiter = get_rate_limiter("AWSPolly", burst=self.max_workers)
 
     def run(self, text, filepath, random_voice: bool = False):
-        try:
-            session = Session(profile_name="polly")
-            polly = session.client("polly")
-            if random_voice:
-                voice = self.randomvoice()
-            else:
-                if not settings.config["settings"]["tts"]["aws_polly_voice"]:
-                    raise ValueError(
-                        f"Please set the TOML variable AWS_VOICE to a valid voice. options are: {voices}"
-                    )
-                voice = str(settings.config["settings"]["tts"]["aws_polly_voice"]).capitalize()
+        polly = get_client(self.endpoint_url, max_pool_connections=self.max_workers)
+        if random_voice:
+            voice = self.randomvoice()
+        else:
+            if not settings.config["settings"]["tts"]["aws_polly_voice"]:
+                raise ValueError(
+                    f"Please set the TOML variable AWS_VOICE to a valid voice. options are: {voices}"
+                )
+            voice = str(settings.config["settings"]["tts"]["aws_polly_voice"]).capitalize()
+
+        for attempt in range(self.rate_limiter.max_retries + 1):
+            if attempt:
+                self.rate_limiter.count_retry()
+            self.rate_limiter.acquire()
             try:
                 # Request speech synthesis
                 response = polly.synthesize_speech(
                     Text=text, OutputFormat="mp3", VoiceId=voice, Engine="neural"
                 )
-            except (BotoCoreError, ClientError) as error:
-                # The service returned an error, exit gracefully
-                print(error)
-                sys.exit(-1)
-
-            # Access the audio stream from the response
-            if "AudioStream" in response:
-                file = open(filepath, "wb")
-                file.write(response["AudioStream"].read())
-                file.close()
-                # print_substep(f"Saved Text {idx} to MP3 files successfully.", style="bold green")
-
-            else:
-                # The response didn't contain audio data, exit gracefully
-                print("Could not stream audio")
-                sys.exit(-1)
-        except ProfileNotFound:
-            print("You need to install the AWS CLI and configure your profile")
-            print(
-                """
-            Linux: https://docs.aws.amazon.com/polly/latest/dg/setup-aws-cli.html
-            Windows: https://docs.aws.amazon.com/polly/latest/dg/install-voice-plugin2.html
-            """
-            )
-            sys.exit(-1)
+                self.rate_limiter.update(200, {})
+                break
+            except ClientError as error:
+                if error.response["Error"]["Code"] not in throttling_errors:
+                    raise AWSPollyException(str(error)) from error
+                # throttled, back off and let the rate limiter learn the real limit
+                delay = self.rate_limiter.update(429, {}, attempt)
+                if attempt < self.rate_limiter.max_retries:
+                    time.sleep(delay)
+            except BotoCoreError as error:
+                raise AWSPollyException(str(error)) from error
+        else:
+            raise AWSPollyException(f"Still throttled after {attempt + 1} attempts")
+
+        # Access the audio stream from the response
+        if "AudioStream" not in response:
+            # The response didn't contain audio data
+            raise AWSPollyException("Could not stream audio")
+        with open(filepath, "wb") as file:
+            file.write(response["AudioStream"].read())
 
     def randomvoice(self):
         return random.choice(self.voices)
+
+
+class AWSPollyException(Exception):
+    pass
@@ -0,0 +1,137 @@
+import hashlib
+import os
+import shutil
+import threading
+from pathlib import Path
+from typing import Optional, Tuple
+
+from utils import settings
+from utils.console import print_substep
+
+__all__ = ["TTSCache", "voice_of"]
+
+# the config key that holds the voice of each provider, it is part of the cache key
+voice_settings = {
+    "TikTok": "tiktok_voice",
+    "StreamlabsPolly": "streamlabs_polly_voice",
+    "AWSPolly": "aws_polly_voice",
+    "elevenlabs": "elevenlabs_voice_name",
+    "pyttsx": "python_voice",
+    "espeak": "espeak_voice",
+}
+
+
+def voice_of(tts_module) -> Tuple[str, str]:
+    """Returns the (provider, voice) a TTS module reads with, "random" if the voice is random.
+
+    A module that reads with several voices, like the router, gives them in its voice attribute.
+    """
+    provider = getattr(tts_module, "provider_name", type(tts_module).__name__)
+    if settings.config["settings"]["tts"]["random_voice"]:
+        return provider, "random"
+    if getattr(tts_module, "voice", None) is not None:
+        return provider, str(tts_module.voice)
+    return provider, str(settings.config["settings"]["tts"].get(voice_settings.get(provider), ""))
+
+
+class TTSCache:
+    """Content addressed cache of the audio clips returned by the TTS providers.
+
+    Clips are stored under assets/cache/tts by a hash of (provider, voice, language, text) and are
+    copied into the temp folder of the thread on a hit. When the cache grows over max_size_mb the
+    least recently used clips are removed.
+
+    Args:
+        directory (Optional)   : The folder where the clips are stored.
+        max_size_mb (Optional) : The maximum size of the cache in megabytes, 0 disables the cache.
+    """
+
+    def __init__(self, directory: str = "assets/cache/tts", max_size_mb: Optional[int] = None):
+        if max_size_mb is None:
+            max_size_mb = settings.config["settings"]["tts"].get("tts_cache_size", 500)
+        self.directory = directory
+        self.max_size = int(max_size_mb) * 1024 * 1024
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_size > 0
+
+    def key(self, tts_module, text: str) -> str:
+        provider, voice = voice_of(tts_module)
+        lang = settings.config["reddit"]["thread"]["post_lang"] or ""
+        return hashlib.sha256("\0".join((provider, voice, lang, text)).encode("utf-8")).hexdigest()
+
+    def path(self, key: str) -> str:
+        return f"{self.directory}/{key[:2]}/{key}.mp3"
+
+    def fetch(self, key: str, filepath: str) -> bool:
+        """Copies the cached clip to filepath. Returns False if the clip is not cached."""
+        if not self.enabled:
+            return False
+        cached = self.path(key)
+        try:
+            shutil.copyfile(cached, filepath)
+            os.utime(cached)  # mark the clip as recently used
+        except FileNotFoundError:
+            with self._lock:
+                self.misses += 1
+            return False
+        with self._lock:
+            self.hits += 1
+        return True
+
+    def store(self, key: str, filepath: str):
+        if not self.enabled or not os.path.exists(filepath) or os.path.getsize(filepath) == 0:
+            return
+        cached = self.path(key)
+        Path(cached).parent.mkdir(parents=True, exist_ok=True)
+        # write to a private name first so a concurrent fetch never reads half a clip
+        tmp = f"{cached}.{threading.get_ident()}.tmp"
+        shutil.copyfile(filepath, tmp)
+        os.replace(tmp, cached)
+
+    def discard(self, key: str):
+        """Removes a clip, used when a cached clip turns out to be unreadable"""
+        try:
+            os.remove(self.path(key))
+        except FileNotFoundError:
+            pass
+
+    def evict(self) -> int:
+        """Removes the least recently used clips until the cache fits in max_size.
+
+        Returns:
+            int: How many clips were removed
+        """
+        if not self.enabled or not os.path.isdir(self.directory):
+            return 0
+        clips = []
+        for root, _, files in os.walk(self.directory):
+            for file in files:
+                stat = os.stat(os.path.join(root, file))
+                clips.append((stat.st_mtime, stat.st_size, os.path.join(root, file)))
+        total = sum(size for _, size, _ in clips)
+        removed = 0
+        for _, size, file in sorted(clips):
+            if total <= self.max_size:
+                break
+            try:
+                os.remove(file)
+            except OSError:
+                continue
+            total -= size
+            removed += 1
+        return removed
+
+    def report(self):
+        lookups = self.hits + self.misses
+        if not self.enabled or lookups == 0:
+            return
+        print_substep(
+            f"TTS cache: {self.hits} hits, {self.misses} misses "
+            f"({self.hits / lookups:.0%} hit rate)",
+            style="bold blue",
+        )
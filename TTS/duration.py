@@ -0,0 +1,110 @@
+import math
+import threading
+from typing import Dict, List, Sequence
+
+from TTS.cache import voice_of
+from utils.jsonstore import load_json, save_json
+
+__all__ = ["SpeechRateModel", "select_comments"]
+
+# used until a voice has enough clips to fit its own rate, about the pace of the TikTok voices
+DEFAULT_SECONDS_PER_CHAR = 1 / 14
+DEFAULT_OVERHEAD = 0.3
+
+
+class SpeechRateModel:
+    """Predicts how long a voice takes to read a text, before the text is sent to the provider.
+
+    The duration of a clip is modelled as overhead + seconds_per_char * len(text). Both are fitted
+    by least squares on the last clips read by the same provider and voice, which are kept in a
+    JSON file so the model keeps learning across runs.
+
+    Args:
+        tts_module           : The TTS module whose voice is modelled.
+        path (Optional)      : The JSON file the samples are stored in.
+        window (Optional)    : How many of the latest clips the fit uses.
+    """
+
+    def __init__(self, tts_module, path: str = "assets/cache/speech_rate.json", window: int = 200):
+        self.voice = ":".join(voice_of(tts_module))
+        self.path = path
+        self.window = window
+        self._lock = threading.Lock()
+        self.samples: Dict[str, List[List[float]]] = load_json(path)
+        self.overhead, self.seconds_per_char = self.fit()
+
+    def fit(self):
+        """Returns (overhead, seconds_per_char) fitted on the samples of the voice"""
+        samples = self.samples.get(self.voice, [])
+        if len(samples) < 5:
+            return DEFAULT_OVERHEAD, DEFAULT_SECONDS_PER_CHAR
+        mean_x = sum(x for x, _ in samples) / len(samples)
+        mean_y = sum(y for _, y in samples) / len(samples)
+        var_x = sum((x - mean_x) ** 2 for x, _ in samples)
+        if var_x == 0:
+            return 0.0, mean_y / mean_x
+        slope = sum((x - mean_x) * (y - mean_y) for x, y in samples) / var_x
+        if slope <= 0:  # not enough spread in the lengths yet
+            return DEFAULT_OVERHEAD, DEFAULT_SECONDS_PER_CHAR
+        return max(0.0, mean_y - slope * mean_x), slope
+
+    def predict(self, text: str) -> float:
+        return self.overhead + self.seconds_per_char * len(text)
+
+    def observe(self, text: str, duration: float):
+        """Records the real duration of a clip. Safe to call from the worker pool."""
+        if not text or not duration:
+            return
+        with self._lock:
+            samples = self.samples.setdefault(self.voice, [])
+            samples.append([len(text), duration])
+            del samples[: -self.window]
+
+    def save(self):
+        save_json(self.path, self.samples, self._lock)
+
+
+def select_comments(
+    lengths: Sequence[float], scores: Sequence[int], budget: float, resolution: float = 0.1
+) -> List[int]:
+    """Picks the comments that best fill the budget, as a 0/1 knapsack.
+
+    Every comment is worth its predicted length weighted by the log of its score, so the videos
+    are filled as close to the budget as possible with the best rated comments. When no comment
+    fits, the best rated one is kept anyway, so a video never ends up with the title alone.
+
+    Args:
+        lengths (Sequence[float]): The predicted length of every comment, in seconds
+        scores (Sequence[int]): The reddit score of every comment
+        budget (float): The number of seconds to fill
+        resolution (float): The step the lengths are rounded up to, in seconds
+
+    Returns:
+        List[int]: The indexes of the chosen comments, in their original order
+    """
+    if not lengths:
+        return []
+    # the best rated comment, the shortest one among equals
+    fallback = [max(range(len(lengths)), key=lambda i: (scores[i], -lengths[i]))]
+    capacity = int(budget / resolution)
+    if capacity <= 0:
+        return fallback
+    weights = [max(1, math.ceil(length / resolution)) for length in lengths]
+    values = [length * (1 + math.log1p(max(0, score))) for length, score in zip(lengths, scores)]
+    best = [0.0] * (capacity + 1)
+    taken = []  # taken[i][c]: comment i is in the best pick of capacity c among the first i + 1
+    for weight, value in zip(weights, values):
+        row = bytearray(capacity + 1)
+        for c in range(capacity, weight - 1, -1):
+            if best[c - weight] + value > best[c]:
+                best[c] = best[c - weight] + value
+                row[c] = 1
+        taken.append(row)
+
+    chosen = []
+    c = capacity
+    for i in range(len(weights) - 1, -1, -1):
+        if taken[i][c]:
+            chosen.append(i)
+            c -= weights[i]
+    return chosen[::-1] or fallback
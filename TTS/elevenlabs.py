@@ -3,6 +3,8 @@ import random
 from elevenlabs import generate, save
 
 from utils import settings
+from utils.credentials import CredentialRejected, get_credential_pool, parse_credentials
+from utils.ratelimit import RateLimitExceeded
 
 voices = [
     "Adam",
@@ -16,11 +18,26 @@ voices = [
     "Sam",
 ]
 
+# errors of the API that are about the key rather than the request
+rejected_errors = ("quota", "api key", "api_key", "unauthorized", "401")
+
 
 class elevenlabs:
     def __init__(self):
         self.max_chars = 2500
+        self.max_workers = settings.config["settings"]["tts"].get("elevenlabs_max_workers", 2)
         self.voices = voices
+        api_keys = parse_credentials(settings.config["settings"]["tts"]["elevenlabs_api_key"])
+        if not api_keys:
+            raise ValueError(
+                "You didn't set an Elevenlabs API key! Please set the config variable ELEVENLABS_API_KEY to a valid API key."
+            )
+        self.api_keys = get_credential_pool(
+            "elevenlabs",
+            api_keys,
+            strategy=settings.config["settings"]["tts"].get("credential_strategy", "round_robin"),
+            burst=self.max_workers,
+        )
 
     def run(self, text, filepath, random_voice: bool = False):
         if random_voice:
@@ -28,15 +45,24 @@ class elevenlabs:
         else:
             voice = str(settings.config["settings"]["tts"]["elevenlabs_voice_name"]).capitalize()
 
-        if settings.config["settings"]["tts"]["elevenlabs_api_key"]:
-            api_key = settings.config["settings"]["tts"]["elevenlabs_api_key"]
-        else:
-            raise ValueError(
-                "You didn't set an Elevenlabs API key! Please set the config variable ELEVENLABS_API_KEY to a valid API key."
-            )
-
-        audio = generate(api_key=api_key, text=text, voice=voice, model="eleven_multilingual_v1")
+        while True:
+            try:
+                with self.api_keys.use() as api_key:
+                    api_key.rate_limiter.acquire()
+                    audio = self.generate(api_key.value, text, voice)
+                break
+            except (CredentialRejected, RateLimitExceeded):
+                continue  # quarantined by the pool, try the next key
         save(audio=audio, filename=filepath)
 
+    @staticmethod
+    def generate(api_key: str, text: str, voice: str) -> bytes:
+        try:
+            return generate(api_key=api_key, text=text, voice=voice, model="eleven_multilingual_v1")
+        except Exception as e:
+            if any(error in str(e).lower() for error in rejected_errors):
+                raise CredentialRejected(str(e)) from e
+            raise
+
     def randomvoice(self):
         return random.choice(self.voices)
@@ -1,20 +1,32 @@
 import os
 import re
+import subprocess
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import Tuple
+from typing import List, Optional, Tuple
 
-import numpy as np
-import translators
-from moviepy.audio.AudioClip import AudioClip
-from moviepy.audio.fx.volumex import volumex
-from moviepy.editor import AudioFileClip
+import ffmpeg
 from rich.progress import track
 
+from TTS.cache import TTSCache
+from TTS.duration import SpeechRateModel, select_comments
 from utils import settings
 from utils.console import print_step, print_substep
+from utils.credentials import report_credential_pools
+from utils.probe import duration
+from utils.ratelimit import report_rate_limiters
+from utils.silence import detect_silences, get_silence
+from utils.translation import translate, translator
 from utils.voice import sanitize_text
 
 
+# read as a pause by the providers, so packed comments can be split at the silences
+PACK_SEPARATOR: str = " ... ... "
+
+# sample rate of the clips when lossless_audio is enabled
+AUDIO_SAMPLE_RATE: int = 44100
+
 DEFAULT_MAX_LENGTH: int = (
     50  # Video length variable, edit this on your own risk. It should work, but it's not supported
 )
@@ -32,6 +44,9 @@ class TTSEngine:
 
     Notes:
         tts_module must take the arguments text and filepath.
+        tts_module may define max_workers, the number of clips it can synthesize at the same time.
+        Comments are synthesized by a pool of that size, but the clips are counted in order so
+        the numbering and the max_length cutoff are the same as a sequential run.
     """
 
     def __init__(
@@ -50,6 +65,14 @@ class TTSEngine:
         self.max_length = max_length
         self.length = 0
         self.last_clip_length = last_clip_length
+        self.max_workers = max(1, int(getattr(self.tts_module, "max_workers", 1)))
+        # comments and the parts of split comments share the provider's max_workers
+        self._slots = threading.BoundedSemaphore(self.max_workers)
+        self.pack = settings.config["settings"]["tts"].get("pack_short_comments", False)
+        self.packed_texts = {}
+        self.ext = clip_extension()
+        self.cache = TTSCache()
+        self.speech_rate = SpeechRateModel(self.tts_module)
 
     def add_periods(
         self,
@@ -68,11 +91,25 @@ class TTSEngine:
             comment["comment_body"] = comment["comment_body"].replace(". . ", ".")
             comment["comment_body"] = re.sub(r'\."\.', '".', comment["comment_body"])
 
+    def prefetch_translations(self):
+        """Translates the title and every text of the thread in a few batched requests"""
+        lang = settings.config["reddit"]["thread"]["post_lang"]
+        if not lang:
+            return
+        texts = [self.reddit_object["thread_title"]]
+        if settings.config["settings"]["storymode"]:
+            post = self.reddit_object["thread_post"]
+            texts += [post] if isinstance(post, str) else post
+        else:
+            texts += [comment["comment_body"] for comment in self.reddit_object["comments"]]
+        translator.prefetch(texts, lang)
+
     def run(self) -> Tuple[int, int]:
         Path(self.path).mkdir(parents=True, exist_ok=True)
         print_step("Saving Text to MP3 files...")
 
         self.add_periods()
+        self.prefetch_translations()
         self.call_tts("title", process_text(self.reddit_object["thread_title"]))
         # processed_text = ##self.reddit_object["thread_post"] != ""
         idx = 0
@@ -81,6 +118,7 @@ class TTSEngine:
             if settings.config["settings"]["storymodemethod"] == 0:
                 if len(self.reddit_object["thread_post"]) > self.tts_module.max_chars:
                     self.split_post(self.reddit_object["thread_post"], "postaudio")
+                    self.add_clip_length(self.get_clip_length("postaudio"))
                 else:
                     self.call_tts("postaudio", process_text(self.reddit_object["thread_post"]))
             elif settings.config["settings"]["storymodemethod"] == 1:
@@ -88,33 +126,148 @@ class TTSEngine:
                     self.call_tts(f"postaudio-{idx}", process_text(text))
 
         else:
-            for idx, comment in track(enumerate(self.reddit_object["comments"]), "Saving..."):
-                # ! Stop creating mp3 files if the length is greater than max length.
-                if self.length > self.max_length and idx > 1:
-                    self.length -= self.last_clip_length
-                    idx -= 1
-                    break
-                if (
-                    len(comment["comment_body"]) > self.tts_module.max_chars
-                ):  # Split the comment if it is too long
-                    self.split_post(comment["comment_body"], idx)  # Split the comment
-                else:  # If the comment is not too long, just call the tts engine
-                    self.call_tts(f"{idx}", process_text(comment["comment_body"]))
+            self.select_comments()
+            comments = self.reddit_object["comments"]
+            jobs = self.pack_comments() if self.pack else [[i] for i in range(len(comments))]
+            job_of = {
+                i: (job, position)
+                for job, idxs in enumerate(jobs)
+                for position, i in enumerate(idxs)
+            }
+            executor = ThreadPoolExecutor(max_workers=self.max_workers)
+            pending = {}
+            next_job = 0
+            try:
+                for idx in track(range(len(comments)), "Saving..."):
+                    # ! Stop creating mp3 files if the length is greater than max length.
+                    if self.length > self.max_length and idx > 1:
+                        self.length -= self.last_clip_length
+                        idx -= 1
+                        break
+                    job, position = job_of[idx]
+                    # keep at most max_workers jobs in flight, ahead of the one being counted
+                    while next_job < len(jobs) and next_job < job + self.max_workers:
+                        pending[next_job] = executor.submit(self.save_comments, jobs[next_job])
+                        next_job += 1
+                    clip_length = pending[job].result()[position]
+                    self.speech_rate.observe(
+                        process_text(comments[idx]["comment_body"]), clip_length
+                    )
+                    self.add_clip_length(clip_length)
+                else:
+                    idx = len(comments)  # every comment fit
+            finally:
+                executor.shutdown(wait=True, cancel_futures=True)
 
+        self.speech_rate.save()
+        self.cache.evict()
+        self.cache.report()
+        report_rate_limiters()
+        report_credential_pools()
+        if hasattr(self.tts_module, "report"):
+            self.tts_module.report()
         print_substep("Saved Text to MP3 files successfully.", style="bold green")
         return self.length, idx
 
+    def select_comments(self):
+        """Keeps the comments that best fill max_length, before any of them is synthesized.
+
+        The length of every comment is predicted by the speech rate of the voice, and the subset
+        that fills the time left after the title best, weighted by the comment scores, is kept in
+        its original order. The screenshots and the final video use the same list.
+        """
+        comments = self.reddit_object["comments"]
+        lengths = [self.speech_rate.predict(process_text(c["comment_body"])) for c in comments]
+        chosen = select_comments(
+            lengths,
+            [comment.get("comment_score", 0) for comment in comments],
+            self.max_length - self.length,
+        )
+        self.reddit_object["comments"] = [comments[i] for i in chosen]
+        print_substep(
+            f"Picked {len(chosen)} of {len(comments)} comments, "
+            f"about {self.length + sum(lengths[i] for i in chosen):.0f} seconds of audio"
+        )
+
+    def pack_comments(self) -> List[List[int]]:
+        """Groups consecutive comments that fit together in one request of the provider.
+
+        Returns:
+            List[List[int]]: The indexes of the comments of every request
+        """
+        jobs = []
+        packed_len = 0
+        for idx, comment in enumerate(self.reddit_object["comments"]):
+            text = process_text(comment["comment_body"])
+            self.packed_texts[idx] = text
+            fits = packed_len + len(PACK_SEPARATOR) + len(text) <= self.tts_module.max_chars
+            if jobs and packed_len and fits:
+                jobs[-1].append(idx)
+                packed_len += len(PACK_SEPARATOR) + len(text)
+            else:
+                jobs.append([idx])
+                # comments that need to be split are never packed
+                packed_len = (
+                    len(text) if len(comment["comment_body"]) <= self.tts_module.max_chars else 0
+                )
+        return jobs
+
+    def save_comments(self, idxs: List[int]) -> List[Optional[float]]:
+        """Synthesizes the comments of a job, packed in one request if there is more than one"""
+        comments = self.reddit_object["comments"]
+        if len(idxs) == 1:
+            return [self.save_comment(idxs[0], comments[idxs[0]]["comment_body"])]
+
+        packed = f"{idxs[0]}-{idxs[-1]}.pack"
+        self.synthesize(packed, PACK_SEPARATOR.join(self.packed_texts[i] for i in idxs))
+        packed_path = f"{self.path}/{packed}.{self.ext}"
+        cuts = None
+        if is_audio(packed_path):
+            cuts = pack_cuts(
+                [s for s in detect_silences(packed_path) if s[0] > 0],
+                [self.packed_texts[i] for i in idxs],
+                duration(packed_path),
+            )
+        if cuts is None:
+            # no pause where a comment should end, read them one by one instead
+            if os.path.exists(packed_path):
+                os.unlink(packed_path)
+            return [self.save_comment(i, comments[i]["comment_body"]) for i in idxs]
+        bounds = [0.0] + cuts + [None]
+        for i, start, end in zip(idxs, bounds, bounds[1:]):
+            cut = {"ss": start} if end is None else {"ss": start, "to": end}
+            ffmpeg.input(packed_path, **cut).output(
+                f"{self.path}/{i}.{self.ext}", **clip_output_options()
+            ).overwrite_output().run(quiet=True)
+        os.unlink(packed_path)
+        return [self.get_clip_length(f"{i}") for i in idxs]
+
+    def save_comment(self, idx: int, text: str) -> Optional[float]:
+        """Synthesizes one comment to {idx}.mp3 (or .wav). Safe to call from the worker pool.
+
+        Returns:
+            Optional[float]: The length of the clip, None if it could not be read
+        """
+        if len(text) > self.tts_module.max_chars:  # Split the comment if it is too long
+            self.split_post(text, idx)  # Split the comment
+        else:  # If the comment is not too long, just call the tts engine
+            self.synthesize(f"{idx}", process_text(text))
+        return self.get_clip_length(f"{idx}")
+
     def split_post(self, text: str, idx):
-        split_files = []
         split_text = [
             x.group().strip()
             for x in re.finditer(
                 r" *(((.|\n){0," + str(self.tts_module.max_chars) + "})(\.|.$))", text
             )
         ]
-        self.create_silence_mp3()
+        silence = get_silence(
+            settings.config["settings"]["tts"]["silence_duration"],
+            sample_rate=AUDIO_SAMPLE_RATE,
+            codec=self.ext,
+        )
 
-        idy = None
+        parts = []
         for idy, text_cut in enumerate(split_text):
             newtext = process_text(text_cut)
             # print(f"{idx}-{idy}: {newtext}\n")
@@ -122,56 +275,155 @@ class TTSEngine:
             if not newtext or newtext.isspace():
                 print("newtext was blank because sanitized split text resulted in none")
                 continue
-            else:
-                self.call_tts(f"{idx}-{idy}.part", newtext)
-                with open(f"{self.path}/list.txt", "w") as f:
-                    for idz in range(0, len(split_text)):
-                        f.write("file " + f"'{idx}-{idz}.part.mp3'" + "\n")
-                    split_files.append(str(f"{self.path}/{idx}-{idy}.part.mp3"))
-                    f.write("file " + f"'silence.mp3'" + "\n")
-
-                os.system(
-                    "ffmpeg -f concat -y -hide_banner -loglevel panic -safe 0 "
-                    + "-i "
-                    + f"{self.path}/list.txt "
-                    + "-c copy "
-                    + f"{self.path}/{idx}.mp3"
-                )
+            parts.append((f"{idx}-{idy}.part", newtext))
+
+        # synthesize every part first, the provider slots bound how many run at the same time
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            list(executor.map(lambda part: self.synthesize(*part), parts))
+
+        # then concatenate them once. Every split post has its own list so they can be built at once
+        with open(f"{self.path}/list-{idx}.txt", "w") as f:
+            for filename, _ in parts:
+                f.write("file " + f"'{filename}.{self.ext}'" + "\n")
+            f.write("file " + f"'{silence}'" + "\n")
+        subprocess.run(
+            [
+                "ffmpeg",
+                "-f",
+                "concat",
+                "-y",
+                "-hide_banner",
+                "-loglevel",
+                "panic",
+                "-safe",
+                "0",
+                "-i",
+                f"{self.path}/list-{idx}.txt",
+                "-c",
+                "copy",
+                f"{self.path}/{idx}.{self.ext}",
+            ]
+        )
         try:
-            for i in range(0, len(split_files)):
-                os.unlink(split_files[i])
+            for filename, _ in parts:
+                os.unlink(f"{self.path}/{filename}.{self.ext}")
         except FileNotFoundError as e:
             print("File not found: " + e.filename)
         except OSError:
             print("OSError")
 
-    def call_tts(self, filename: str, text: str):
-        self.tts_module.run(
-            text,
-            filepath=f"{self.path}/{filename}.mp3",
-            random_voice=settings.config["settings"]["tts"]["random_voice"],
-        )
+    def synthesize(self, filename: str, text: str):
+        filepath = f"{self.path}/{filename}.mp3"
+        key = self.cache.key(self.tts_module, text)
+        cached = self.cache.fetch(key, filepath)
+        if cached and not is_audio(filepath):
+            self.cache.discard(key)
+            cached = False
+        if not cached:
+            with self._slots:
+                self.tts_module.run(
+                    text,
+                    filepath=filepath,
+                    random_voice=settings.config["settings"]["tts"]["random_voice"],
+                )
+            # providers may write an error page instead of a clip, never cache one of those
+            if self.cache.enabled and is_audio(filepath):
+                self.cache.store(key, filepath)
+        if self.ext != "mp3":
+            # decode the provider's mp3 once, everything after this works on PCM
+            output_path = f"{self.path}/{filename}.{self.ext}"
+            try:
+                ffmpeg.input(filepath).output(
+                    output_path, **clip_output_options()
+                ).overwrite_output().run(quiet=True)
+            except ffmpeg.Error:
+                # no clip or not audio, leave no file so the clip has no length like in mp3 mode
+                if os.path.exists(output_path):
+                    os.unlink(output_path)
+            if os.path.exists(filepath):
+                os.unlink(filepath)
+
+    def get_clip_length(self, filename: str) -> Optional[float]:
         # try:
         #     self.length += MP3(f"{self.path}/{filename}.mp3").info.length
         # except (MutagenError, HeaderNotFoundError):
         #     self.length += sox.file_info.duration(f"{self.path}/{filename}.mp3")
         try:
-            clip = AudioFileClip(f"{self.path}/{filename}.mp3")
-            self.last_clip_length = clip.duration
-            self.length += clip.duration
-            clip.close()
-        except:
+            return duration(f"{self.path}/{filename}.{self.ext}")
+        except (OSError, KeyError, ValueError, ffmpeg.Error):
+            return None
+
+    def add_clip_length(self, clip_length: Optional[float]):
+        if clip_length is None:
             self.length = 0
+        else:
+            self.last_clip_length = clip_length
+            self.length += clip_length
 
-    def create_silence_mp3(self):
-        silence_duration = settings.config["settings"]["tts"]["silence_duration"]
-        silence = AudioClip(
-            make_frame=lambda t: np.sin(440 * 2 * np.pi * t),
-            duration=silence_duration,
-            fps=44100,
-        )
-        silence = volumex(silence, 0)
-        silence.write_audiofile(f"{self.path}/silence.mp3", fps=44100, verbose=False, logger=None)
+    def call_tts(self, filename: str, text: str):
+        self.synthesize(filename, text)
+        clip_length = self.get_clip_length(filename)
+        self.speech_rate.observe(text, clip_length)
+        self.add_clip_length(clip_length)
+
+
+def pack_cuts(
+    silences: List[Tuple[float, float]], texts: List[str], total: float
+) -> Optional[List[float]]:
+    """Finds where a clip of texts joined by PACK_SEPARATOR goes from one text to the next.
+
+    A boundary is expected in the middle of its separator, at the share of the clip of the
+    characters read before it. The longest silence within half the shorter of the two texts of that
+    point is the cut, so a pause inside a comment, like an ellipsis, is not taken for the separator
+    unless it is right where the comment should end.
+
+    Args:
+        silences (List[Tuple[float, float]]): (start, end) of the silences of the clip
+        texts (List[str]): The texts of the clip, in order
+        total (float): Length of the clip in seconds
+
+    Returns:
+        Optional[List[float]]: The time of every cut, None if a boundary has no silence near it
+    """
+    per_char = total / len(PACK_SEPARATOR.join(texts))
+    cuts = []
+    position = 0.0
+    for left, right in zip(texts, texts[1:]):
+        position += len(left) + len(PACK_SEPARATOR) / 2
+        expected = position * per_char
+        tolerance = min(len(left), len(right)) * per_char / 2
+        near = [
+            (start, end)
+            for start, end in silences
+            if abs((start + end) / 2 - expected) <= tolerance
+            and (not cuts or (start + end) / 2 > cuts[-1])
+        ]
+        if not near:
+            return None
+        start, end = max(near, key=lambda s: s[1] - s[0])
+        cuts.append((start + end) / 2)
+        position += len(PACK_SEPARATOR) / 2
+    return cuts
+
+
+def is_audio(filepath: str) -> bool:
+    """Whether filepath exists and can be read as audio"""
+    try:
+        return duration(filepath) > 0
+    except (OSError, KeyError, ValueError, ffmpeg.Error):
+        return False
+
+
+def clip_extension() -> str:
+    """Extension of the TTS clips, wav when the lossless_audio setting is enabled"""
+    return "wav" if settings.config["settings"]["tts"].get("lossless_audio", False) else "mp3"
+
+
+def clip_output_options() -> dict:
+    """ffmpeg output options of the TTS clips written by the engine"""
+    if clip_extension() == "wav":
+        return {"acodec": "pcm_s16le", "ar": AUDIO_SAMPLE_RATE, "ac": 1}
+    return {"b:a": "192k"}
 
 
 def process_text(text: str, clean: bool = True):
@@ -179,6 +431,6 @@ def process_text(text: str, clean: bool = True):
     new_text = sanitize_text(text) if clean else text
     if lang:
         print_substep("Translating Text...")
-        translated_text = translators.translate_text(text, translator="google", to_language=lang)
+        translated_text = translate(text, lang)
         new_text = sanitize_text(translated_text)
     return new_text
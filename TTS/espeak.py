@@ -0,0 +1,61 @@
+import random
+import shutil
+import subprocess
+
+from utils import settings
+
+__all__ = ["espeak"]
+
+voices = [
+    "en-us",
+    "en-gb",
+    "en-gb-scotland",
+    "en-gb-x-rp",
+    "en-029",
+    "en-us+f3",
+    "en-gb+f2",
+]
+
+
+def _synthesize(binary: str, text: str, filepath: str, voice: str, speed: int):
+    """espeak renders a wav that ffmpeg encodes to filepath"""
+    wav = subprocess.run(
+        [binary, "-v", voice, "-s", str(speed), "--stdout", text],
+        capture_output=True,
+        check=True,
+    ).stdout
+    subprocess.run(
+        ["ffmpeg", "-y", "-loglevel", "error", "-f", "wav", "-i", "pipe:0", filepath],
+        input=wav,
+        check=True,
+    )
+
+
+class espeak:
+    """Offline formant TTS, eSpeak NG (or eSpeak) running on the CPU without any network call.
+
+    Every clip is an espeak and an ffmpeg process. TTSEngine runs espeak_max_workers clips at the
+    same time from its threads, which only wait for the processes, so the clips use that many cores.
+    """
+
+    def __init__(self):
+        self.max_chars = 1000
+        self.max_workers = settings.config["settings"]["tts"].get("espeak_max_workers", 4)
+        self.voices = voices
+        self.binary = shutil.which("espeak-ng") or shutil.which("espeak")
+        if self.binary is None:
+            raise ValueError(
+                "espeak-ng was not found. Install it (apt install espeak-ng, or the Windows installer) to use the espeak TTS."
+            )
+
+    def get_voice(self, random_voice: bool = False) -> str:
+        if random_voice:
+            return self.randomvoice()
+        return settings.config["settings"]["tts"].get("espeak_voice", "") or "en-us"
+
+    def run(self, text: str, filepath: str, random_voice: bool = False):
+        speed = int(settings.config["settings"]["tts"].get("espeak_speed", 175))
+        _synthesize(self.binary, text, filepath, self.get_voice(random_voice), speed)
+
+    def randomvoice(self):
+        return random.choice(self.voices)
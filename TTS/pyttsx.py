@@ -1,14 +1,80 @@
+import atexit
+import json
+import os
+import queue
 import random
-
-import pyttsx3
+import subprocess
+import sys
+import threading
+from pathlib import Path
 
 from utils import settings
 
 
 class pyttsx:
+    """Offline TTS through pyttsx3, with the engines kept in worker processes.
+
+    Every worker is a python -m TTS.pyttsx_worker process that starts its engine once and then
+    synthesizes the clips it is sent on stdin. The workers are shared by every instance, so the
+    engines survive times_to_run iterations, and they are stopped when the program exits.
+
+    The workers are plain subprocesses rather than a multiprocessing pool, because a spawn child
+    imports main.py again as __mp_main__, with its banner and version check. They run from the root
+    of the repository with the same interpreter, so pyttsx3 must be importable from there.
+    """
+
+    _workers = queue.Queue()  # the idle workers
+    _started = 0
+    _lock = threading.Lock()
+
     def __init__(self):
         self.max_chars = 5000
-        self.voices = []
+        self.max_workers = settings.config["settings"]["tts"].get("pyttsx_max_workers", 2)
+        voice_num = settings.config["settings"]["tts"]["py_voice_num"]
+        self.voices = list(range(int(voice_num))) if voice_num != "" else []
+
+    def worker(self) -> subprocess.Popen:
+        """Takes an idle worker, starting one if fewer than max_workers are running"""
+        with pyttsx._lock:
+            if pyttsx._workers.empty() and pyttsx._started < self.max_workers:
+                pyttsx._started += 1
+                if pyttsx._started == 1:
+                    atexit.register(pyttsx.stop)
+                return subprocess.Popen(
+                    [sys.executable, "-m", "TTS.pyttsx_worker"],
+                    cwd=Path(__file__).resolve().parents[1],
+                    stdin=subprocess.PIPE,
+                    stdout=subprocess.PIPE,
+                    text=True,
+                )
+        return pyttsx._workers.get()
+
+    def synthesize(self, text: str, filepath: str, voice_id: int):
+        worker = self.worker()
+        job = {"text": text, "filepath": os.path.abspath(filepath), "voice_id": voice_id}
+        try:
+            worker.stdin.write(json.dumps(job) + "\n")
+            worker.stdin.flush()
+            line = worker.stdout.readline()
+        except OSError:
+            line = ""
+        if not line:
+            # the worker died, the next clip starts a new one
+            with pyttsx._lock:
+                pyttsx._started -= 1
+            raise RuntimeError(f"the pyttsx worker exited with code {worker.wait()}")
+        pyttsx._workers.put(worker)
+        reply = json.loads(line)
+        if not reply["ok"]:
+            raise RuntimeError(f"pyttsx could not synthesize the clip: {reply['error']}")
+
+    @staticmethod
+    def stop():
+        while not pyttsx._workers.empty():
+            worker = pyttsx._workers.get()
+            worker.stdin.close()
+            worker.wait()
+        pyttsx._started = 0
 
     def run(
         self,
@@ -25,18 +91,9 @@ class pyttsx:
         else:
             voice_id = int(voice_id)
             voice_num = int(voice_num)
-        for i in range(voice_num):
-            self.voices.append(i)
-            i = +1
         if random_voice:
             voice_id = self.randomvoice()
-        engine = pyttsx3.init()
-        voices = engine.getProperty("voices")
-        engine.setProperty(
-            "voice", voices[voice_id].id
-        )  # changing index changes voices but ony 0 and 1 are working here
-        engine.save_to_file(text, f"{filepath}")
-        engine.runAndWait()
+        self.synthesize(text, filepath, voice_id)
 
     def randomvoice(self):
         return random.choice(self.voices)
@@ -0,0 +1,37 @@
+"""Worker process of the pyttsx provider, started by TTS/pyttsx.py as python -m TTS.pyttsx_worker.
+
+It reads one JSON job per line on stdin, {"text", "filepath", "voice_id"}, and answers every job
+with one JSON line, {"ok": true} or {"ok": false, "error": "..."}. Only pyttsx3 is imported, so
+starting a worker does not run main.py again like a multiprocessing spawn would.
+"""
+
+import json
+import os
+import sys
+
+import pyttsx3
+
+
+def main():
+    # the replies get their own copy of stdout, anything the speech driver prints goes to stderr
+    replies = os.fdopen(os.dup(sys.stdout.fileno()), "w")
+    os.dup2(sys.stderr.fileno(), sys.stdout.fileno())
+
+    engine = pyttsx3.init()
+    voices = engine.getProperty("voices")
+    for line in sys.stdin:
+        job = json.loads(line)
+        try:
+            # changing index changes voices but ony 0 and 1 are working here
+            engine.setProperty("voice", voices[job["voice_id"]].id)
+            engine.save_to_file(job["text"], job["filepath"])
+            engine.runAndWait()
+            reply = {"ok": True}
+        except Exception as e:
+            reply = {"ok": False, "error": f"{type(e).__name__}: {e}"}
+        replies.write(json.dumps(reply) + "\n")
+        replies.flush()
+
+
+if __name__ == "__main__":
+    main()
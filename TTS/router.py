@@ -0,0 +1,164 @@
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import List, Optional
+
+from TTS.cache import voice_of
+from utils.console import print_substep
+
+__all__ = ["TTSRouter"]
+
+
+class ProviderStats:
+    """Latency and error rate of the last requests sent to a provider"""
+
+    def __init__(self, window: int = 50):
+        self.latencies = deque(maxlen=window)
+        self.results = deque(maxlen=window)
+        self.requests = 0
+        self.errors = 0
+        self.hedges = 0
+        self.wins = 0
+        self._lock = threading.Lock()
+
+    def record(self, latency: Optional[float], ok: bool):
+        with self._lock:
+            self.requests += 1
+            self.results.append(ok)
+            if ok:
+                self.latencies.append(latency)
+            else:
+                self.errors += 1
+
+    @property
+    def error_rate(self) -> float:
+        return self.results.count(False) / len(self.results) if self.results else 0.0
+
+    def percentile(self, percent: float) -> Optional[float]:
+        latencies = sorted(self.latencies)
+        if len(latencies) < 5:
+            return None
+        return latencies[min(len(latencies) - 1, int(len(latencies) * percent / 100))]
+
+
+class TTSRouter:
+    """Routes every clip to the fastest healthy provider of a list.
+
+    The router tracks the latency and error rate of each provider and sends a clip to the one with
+    the best score. If it is not done by that provider's p95 latency, a hedged duplicate is sent to
+    the next provider and the first clip that comes back is used. A provider that raises is failed
+    over to the next one. The providers should use compatible voices (same language and gender),
+    since any of them may read a given clip.
+
+    Args:
+        providers : The TTS modules to route between, in order of preference.
+    """
+
+    default_deadline = 8.0  # seconds before hedging while there are not enough samples for a p95
+
+    def __init__(self, providers: list):
+        self.providers = [provider() for provider in providers]
+        self.names = [
+            getattr(provider, "provider_name", type(provider).__name__)
+            for provider in self.providers
+        ]
+        self.provider_name = "TTSRouter:" + "+".join(self.names)
+        self.stats = {name: ProviderStats() for name in self.names}
+        # every provider must accept the clip, so the smallest limit wins
+        self.max_chars = min(provider.max_chars for provider in self.providers)
+        self.max_workers = max(getattr(provider, "max_workers", 1) for provider in self.providers)
+        self._executor = ThreadPoolExecutor(
+            max_workers=self.max_workers * len(self.providers), thread_name_prefix="TTSRouter"
+        )
+
+    @property
+    def voice(self) -> str:
+        """The voices of the providers, so the clip cache sees a change of any of them"""
+        return ":".join(voice_of(provider)[1] for provider in self.providers)
+
+    def ranked(self) -> List[int]:
+        """Indexes of the providers, best first. Unknown latencies keep the configured order"""
+
+        def score(index: int) -> float:
+            stats = self.stats[self.names[index]]
+            p95 = stats.percentile(95) or self.default_deadline
+            return p95 * (1 + 10 * stats.error_rate)
+
+        return sorted(range(len(self.providers)), key=lambda index: (score(index), index))
+
+    def _call(self, index: int, text: str, filepath: str, random_voice: bool) -> int:
+        name = self.names[index]
+        start = time.monotonic()
+        try:
+            self.providers[index].run(text, filepath=filepath, random_voice=random_voice)
+        except Exception:
+            self.stats[name].record(None, False)
+            raise
+        if not os.path.exists(filepath) or os.path.getsize(filepath) == 0:
+            self.stats[name].record(None, False)
+            raise RuntimeError(f"{name} did not write the clip")
+        self.stats[name].record(time.monotonic() - start, True)
+        return index
+
+    def run(self, text: str, filepath: str, random_voice: bool = False):
+        order = self.ranked()
+        running = {}
+        error = None
+        root, ext = os.path.splitext(filepath)
+
+        def start(index: int):
+            # every request writes to its own file, the winner is moved to filepath
+            tmp = f"{root}.{self.names[index]}{ext}"
+            running[self._executor.submit(self._call, index, text, tmp, random_voice)] = tmp
+
+        primary = self.stats[self.names[order[0]]]
+        start(order.pop(0))
+        while running:
+            deadline = (primary.percentile(95) or self.default_deadline) if order else None
+            done, _ = wait(running, timeout=deadline, return_when=FIRST_COMPLETED)
+            if not done:
+                # too slow, race a hedged request against it
+                self.stats[self.names[order[0]]].hedges += 1
+                start(order.pop(0))
+                continue
+            for future in done:
+                tmp = running.pop(future)
+                try:
+                    winner = future.result()
+                except Exception as e:
+                    error = e
+                    _remove(tmp)
+                    if order:  # fail over to the next provider
+                        start(order.pop(0))
+                    continue
+                os.replace(tmp, filepath)
+                self.stats[self.names[winner]].wins += 1
+                for loser, loser_tmp in running.items():
+                    loser.add_done_callback(lambda _, path=loser_tmp: _remove(path))
+                return
+        raise error
+
+    def report(self):
+        for name in self.names:
+            stats = self.stats[name]
+            if not stats.requests:
+                continue
+            p50, p95 = stats.percentile(50), stats.percentile(95)
+            print_substep(
+                f"{name}: {stats.requests} requests, {stats.wins} clips used, {stats.hedges} hedged, "
+                f"{stats.errors} errors, p50 {_seconds(p50)}, p95 {_seconds(p95)}",
+                style="bold blue",
+            )
+
+
+def _remove(path: str):
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+
+def _seconds(value: Optional[float]) -> str:
+    return "n/a" if value is None else f"{value:.2f}s"
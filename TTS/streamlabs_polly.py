@@ -3,8 +3,9 @@ import random
 import requests
 from requests.exceptions import JSONDecodeError
 
+from TTS.async_wrapper import PooledHTTPMixin
 from utils import settings
-from utils.voice import check_ratelimit
+from utils.ratelimit import get_rate_limiter
 
 voices = [
     "Brian",
@@ -29,37 +30,71 @@ voices = [
 
 
 class StreamlabsPolly:
-    def __init__(self):
-        self.url = "https://streamlabs.com/polly/speak"
+    # keep-alive connections shared by every instance
+    _session = requests.Session()
+
+    def __init__(self, url: str = "https://streamlabs.com/polly/speak"):
+        self.url = url
         self.max_chars = 550
+        self.max_workers = settings.config["settings"]["tts"].get("streamlabs_polly_max_workers", 2)
         self.voices = voices
+        self.headers = {"Referer": "https://streamlabs.com/"}
+        self.rate_limiter = get_rate_limiter("StreamlabsPolly", burst=self.max_workers)
 
     def run(self, text, filepath, random_voice: bool = False):
-        if random_voice:
-            voice = self.randomvoice()
-        else:
-            if not settings.config["settings"]["tts"]["streamlabs_polly_voice"]:
-                raise ValueError(
-                    f"Please set the config variable STREAMLABS_POLLY_VOICE to a valid voice. options are: {voices}"
-                )
-            voice = str(settings.config["settings"]["tts"]["streamlabs_polly_voice"]).capitalize()
+        voice = self.get_voice(random_voice)
         body = {"voice": voice, "text": text, "service": "polly"}
-        headers = {"Referer" : "https://streamlabs.com/" }
-        response = requests.post(self.url,  headers=headers,data=body)
-        if not check_ratelimit(response):
-            self.run(text, filepath, random_voice)
-
-        else:
+        # throttled requests are retried by the rate limiter instead of recursing into run
+        response = self.rate_limiter.request(
+            lambda: self._session.post(self.url, headers=self.headers, data=body)
+        )
+        try:
+            voice_data = self._session.get(response.json()["speak_url"])
+            with open(filepath, "wb") as f:
+                f.write(voice_data.content)
+        except (KeyError, JSONDecodeError):
             try:
-                voice_data = requests.get(response.json()["speak_url"])
-                with open(filepath, "wb") as f:
-                    f.write(voice_data.content)
+                if response.json()["error"] == "No text specified!":
+                    raise ValueError("Please specify a text to convert to speech.")
             except (KeyError, JSONDecodeError):
-                try:
-                    if response.json()["error"] == "No text specified!":
-                        raise ValueError("Please specify a text to convert to speech.")
-                except (KeyError, JSONDecodeError):
-                    print("Error occurred calling Streamlabs Polly")
+                print("Error occurred calling Streamlabs Polly")
+
+    def get_voice(self, random_voice: bool = False) -> str:
+        if random_voice:
+            return self.randomvoice()
+        if not settings.config["settings"]["tts"]["streamlabs_polly_voice"]:
+            raise ValueError(
+                f"Please set the config variable STREAMLABS_POLLY_VOICE to a valid voice. options are: {voices}"
+            )
+        return str(settings.config["settings"]["tts"]["streamlabs_polly_voice"]).capitalize()
 
     def randomvoice(self):
         return random.choice(self.voices)
+
+
+class AsyncStreamlabsPolly(PooledHTTPMixin, StreamlabsPolly):
+    """Streamlabs Polly with an async run, see TTS/async_wrapper.py"""
+
+    provider_name = "StreamlabsPolly"
+
+    async def run(self, text, filepath, random_voice: bool = False):
+        voice = self.get_voice(random_voice)
+        body = {"voice": voice, "text": text, "service": "polly"}
+        session = await self.http()
+
+        async def post():
+            async with session.post(self.url, data=body) as response:
+                if response.status == 429:
+                    return response.status, response.headers, None
+                return response.status, response.headers, await response.json(content_type=None)
+
+        data = await self.rate_limiter.request_async(post)
+        if "speak_url" not in data:
+            if data.get("error") == "No text specified!":
+                raise ValueError("Please specify a text to convert to speech.")
+            print("Error occurred calling Streamlabs Polly")
+            return
+        async with session.get(data["speak_url"]) as voice_data:
+            content = await voice_data.read()
+        with open(filepath, "wb") as f:
+            f.write(content)
@@ -0,0 +1,117 @@
+"""Benchmarks the render speed of the screenshot overlays against the number of comments.
+
+Run it from the root of the repository:
+
+    python -m benchmarks.overlays [--seconds 30] [--comments 5 10 25 50 100]
+
+A test pattern background gets one screenshot per comment, each on screen for seconds / comments,
+and the graph is rendered to the null muxer so the numbers show the cost of the filters rather
+than of the encoder. "chained" is the oldest graph, one overlay with an enable expression per
+comment, "track" a single overlay fed by timed_images that still scales the screenshots and applies
+their opacity on every frame, and "composited" is make_final_video's graph, where
+composite_screenshots has done both once before the render. The image track needs frames of one
+size, so "track" gets the screenshots padded to the tallest one at their original width.
+"""
+
+import argparse
+import random
+import shutil
+import tempfile
+import time
+
+import ffmpeg
+
+from utils.compositing import composite_screenshots
+from video_creation.final_video import timed_images
+
+W, H = 1080, 1920
+SCREENSHOT_WIDTH = int((W * 45) // 100)
+SOURCE_WIDTH = 500
+
+
+def make_screenshots(directory: str, count: int) -> list:
+    """Writes count png screenshots of random heights, like comments of random lengths"""
+    paths = []
+    for i in range(count):
+        path = f"{directory}/comment_{i}.png"
+        ffmpeg.input(
+            f"color=c=0x{random.randrange(0xFFFFFF):06x}:s={SOURCE_WIDTH}x{random.randrange(100, 600)}",
+            f="lavfi",
+        ).output(path, vframes=1).overwrite_output().run(quiet=True)
+        paths.append(path)
+    return paths
+
+
+def background(seconds: float, fps: int):
+    return ffmpeg.input(f"testsrc2=s={W}x{H}:r={fps}", f="lavfi", t=seconds)
+
+
+def chained(paths: list, durations: list, seconds: float, fps: int):
+    clip = background(seconds, fps)
+    current_time = 0
+    for path, duration in zip(paths, durations):
+        image = ffmpeg.input(path)["v"].filter("scale", SCREENSHOT_WIDTH, -1)
+        clip = clip.overlay(
+            image.filter("colorchannelmixer", aa=0.9),
+            enable=f"between(t,{current_time},{current_time + duration})",
+            x="(main_w-overlay_w)/2",
+            y="(main_h-overlay_h)/2",
+        )
+        current_time += duration
+    return clip
+
+
+def track(paths: list, durations: list, seconds: float, fps: int, directory: str):
+    images = (
+        timed_images(f"{directory}/images.txt", zip(paths, durations))
+        .filter("scale", SCREENSHOT_WIDTH, -1)
+        .filter("colorchannelmixer", aa=0.9)
+    )
+    return background(seconds, fps).overlay(
+        images, x="(main_w-overlay_w)/2", y="(main_h-overlay_h)/2", eof_action="pass"
+    )
+
+
+def composited(paths: list, durations: list, seconds: float, fps: int, directory: str):
+    images = timed_images(f"{directory}/composited.txt", zip(paths, durations))
+    return background(seconds, fps).overlay(
+        images, x="(main_w-overlay_w)/2", y="(main_h-overlay_h)/2", eof_action="pass"
+    )
+
+
+def render(clip) -> float:
+    start = time.perf_counter()
+    clip.output("-", f="null").run(quiet=True)
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--seconds", type=float, default=30, help="length of the video")
+    parser.add_argument("--fps", type=int, default=30)
+    parser.add_argument("--comments", type=int, nargs="+", default=[5, 10, 25, 50, 100])
+    args = parser.parse_args()
+
+    frames = args.seconds * args.fps
+    print(f"{'comments':>8} {'chained fps':>12} {'track fps':>10} {'composited fps':>15}")
+    with tempfile.TemporaryDirectory() as tmp:
+        paths = make_screenshots(tmp, max(args.comments))
+        # composite_screenshots writes next to the sources, keep these apart from the others
+        padded = [
+            shutil.move(path, path.replace("-composited", "-padded"))
+            for path in composite_screenshots(paths, SOURCE_WIDTH, None)
+        ]
+        ready = composite_screenshots(paths, SCREENSHOT_WIDTH, 0.9)
+        for comments in args.comments:
+            durations = [args.seconds / comments] * comments
+            old = render(chained(paths[:comments], durations, args.seconds, args.fps))
+            new = render(track(padded[:comments], durations, args.seconds, args.fps, tmp))
+            baked = render(composited(ready[:comments], durations, args.seconds, args.fps, tmp))
+            print(
+                f"{comments:>8} {frames / old:>12.1f} {frames / new:>10.1f} "
+                f"{frames / baked:>15.1f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
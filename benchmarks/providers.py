@@ -0,0 +1,287 @@
+"""Benchmarks the TTS providers against local stand-ins and checks their run contract.
+
+Run it from the root of the repository:
+
+    python -m benchmarks.providers [--latency 0.2] [--errors 0.05] [--throttle 0.1]
+
+Every provider of TTSProviders is checked for the run(text, filepath, random_voice) contract. The
+HTTP providers are then pointed at local stand-ins of their APIs that answer after --latency
+seconds (plus up to --jitter), fail --errors of the requests with a 500 and throttle --throttle of
+them with a 429. The clips go through the providers' own rate limiters and retries, so the numbers
+are what TTSEngine sees: clips/sec, p50/p95 latency of a clip, bytes written, and the clips that
+failed or were not written, at every --concurrency level. --local adds the offline providers.
+
+GTTS has no stand-in: gTTS builds its URL from a fixed translate.google.<tld> template, so only the
+top level domain can be changed, not the host.
+"""
+
+import argparse
+import base64
+import inspect
+import json
+import os
+import random
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict, List, Optional
+
+from utils import settings
+
+# prefixes of the <provider>_max_workers settings
+PROVIDER_KEYS = ("tiktok", "streamlabs_polly", "aws_polly", "elevenlabs", "espeak", "pyttsx")
+
+TEXT = "This is a comment that is read by the text to speech provider being benchmarked."
+
+
+class StandIn(ThreadingHTTPServer):
+    """Local stand-in of the TikTok, Streamlabs Polly, AWS Polly and ElevenLabs APIs with injected
+    latency and failures"""
+
+    daemon_threads = True
+
+    def __init__(self, latency, jitter, errors, throttle, clip_bytes):
+        super().__init__(("127.0.0.1", 0), StandInHandler)
+        self.latency = latency
+        self.jitter = jitter
+        self.errors = errors
+        self.throttle = throttle
+        self.clip = bytes(random.getrandbits(8) for _ in range(clip_bytes))
+        self.counters = {"requests": 0, "429": 0, "500": 0}
+        self._lock = threading.Lock()
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self.server_address[1]}"
+
+    def count(self, counter: str):
+        with self._lock:
+            self.counters[counter] += 1
+
+    def inject(self) -> Optional[int]:
+        """Waits like the real API would, returns the status of an injected failure if any"""
+        self.count("requests")
+        time.sleep(self.latency + random.uniform(0, self.jitter))
+        roll = random.random()
+        if roll < self.throttle:
+            self.count("429")
+            return 429
+        if roll < self.throttle + self.errors:
+            self.count("500")
+            return 500
+        return None
+
+
+class StandInHandler(BaseHTTPRequestHandler):
+    server: StandIn
+    protocol_version = "HTTP/1.1"  # keep-alive, like the real APIs
+
+    def log_message(self, format, *args):
+        pass
+
+    def reply(self, status: int, body: bytes, content_type: str = "application/json", **headers):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in headers.items():
+            self.send_header(name.replace("_", "-"), value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        status = self.server.inject()
+        if self.path.startswith("/v1/speech"):
+            return self.polly(status)
+        if self.path.startswith("/elevenlabs/v1/text-to-speech/"):
+            return self.elevenlabs(status)
+        if status == 429:
+            return self.reply(429, b"{}", Retry_After="0.2")
+        if status is not None:
+            return self.reply(status, b"Internal Server Error", "text/plain")
+        if self.path.startswith("/tiktok"):
+            data = {"status_code": 0, "data": {"v_str": base64.b64encode(self.server.clip).decode()}}
+        elif self.path.startswith("/polly/speak"):
+            data = {"speak_url": f"{self.server.url}/polly/clip.mp3"}
+        else:
+            return self.reply(404, b"{}")
+        self.reply(200, json.dumps(data).encode())
+
+    def polly(self, status: Optional[int]):
+        """AWS Polly's SynthesizeSpeech, failing with the error types botocore reads"""
+        if status == 429:
+            return self.reply(
+                400, b'{"message": "Rate exceeded"}', x_amzn_ErrorType="ThrottlingException"
+            )
+        if status is not None:
+            return self.reply(
+                500, b'{"message": "Internal failure"}', x_amzn_ErrorType="ServiceFailureException"
+            )
+        self.reply(200, self.server.clip, "audio/mpeg", x_amzn_RequestCharacters=str(len(TEXT)))
+
+    def elevenlabs(self, status: Optional[int]):
+        """ElevenLabs' text-to-speech, with the error details the elevenlabs package parses"""
+        if status is not None:
+            error = "too_many_requests" if status == 429 else "internal_server_error"
+            detail = {"detail": {"status": error, "message": error.replace("_", " ")}}
+            return self.reply(status, json.dumps(detail).encode())
+        self.reply(200, self.server.clip, "audio/mpeg")
+
+    def do_GET(self):
+        if self.path.startswith("/polly/clip.mp3"):
+            return self.reply(200, self.server.clip, "audio/mpeg")
+        self.reply(404, b"")
+
+
+def check_contract(providers: Dict[str, type]) -> List[str]:
+    """Returns the providers whose run does not take (text, filepath, random_voice)"""
+    broken = []
+    for name, provider in providers.items():
+        parameters = inspect.signature(provider.run).parameters
+        if not {"text", "filepath", "random_voice"} <= set(parameters):
+            broken.append(f"{name}.run{inspect.signature(provider.run)}")
+    return broken
+
+
+def reset_shared_state():
+    """Forgets the rate limiters, credential pools and clients of the previous run"""
+    from TTS import aws_polly
+    from utils.credentials import credential_pools
+    from utils.ratelimit import rate_limiters
+
+    rate_limiters.clear()
+    credential_pools.clear()
+    aws_polly._clients.clear()  # sized by the max_workers of the run
+
+
+def percentile(values: List[float], percent: float) -> float:
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * percent / 100))] if values else 0.0
+
+
+def bench(make_provider: Callable, workers: int, clips: int, directory: str) -> dict:
+    provider = make_provider()
+    latencies, failures = [], []
+    written = 0
+    lock = threading.Lock()
+
+    def one(i: int):
+        nonlocal written
+        filepath = f"{directory}/{workers}-{i}.mp3"
+        start = time.perf_counter()
+        try:
+            provider.run(TEXT, filepath=filepath, random_voice=False)
+            with open(filepath, "rb") as f:
+                size = len(f.read())
+            if not size:
+                raise RuntimeError("empty clip")
+        except Exception as e:
+            with lock:
+                failures.append(type(e).__name__)
+            return
+        with lock:
+            latencies.append(time.perf_counter() - start)
+            written += size
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        list(executor.map(one, range(clips)))
+    elapsed = time.perf_counter() - start
+    if hasattr(provider, "close"):
+        provider.close()
+    return {
+        "clips/s": len(latencies) / elapsed,
+        "p50": percentile(latencies, 50),
+        "p95": percentile(latencies, 95),
+        "bytes": written,
+        "failed": len(failures),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--latency", type=float, default=0.2, help="stand-in latency (s)")
+    parser.add_argument("--jitter", type=float, default=0.1, help="random extra latency (s)")
+    parser.add_argument("--errors", type=float, default=0.0, help="share of 500 responses")
+    parser.add_argument("--throttle", type=float, default=0.0, help="share of 429 responses")
+    parser.add_argument("--clips", type=int, default=40, help="clips per run")
+    parser.add_argument("--clip-bytes", type=int, default=16000, help="size of a clip")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 4, 16])
+    parser.add_argument("--local", action="store_true", help="also run espeak and pyttsx")
+    args = parser.parse_args()
+
+    settings.config = {
+        "reddit": {"thread": {"post_lang": ""}},
+        "settings": {
+            "tts": {
+                "random_voice": False,
+                "tiktok_sessionid": "standin",
+                "tiktok_voice": "en_us_001",
+                "streamlabs_polly_voice": "Matthew",
+                "aws_polly_voice": "Matthew",
+                "elevenlabs_api_key": "standin",
+                "elevenlabs_voice_name": "Bella",
+                "python_voice": "0",
+                "py_voice_num": "1",
+            }
+        },
+    }
+    server = StandIn(args.latency, args.jitter, args.errors, args.throttle, args.clip_bytes)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    # the elevenlabs package reads its base URL once, when it is imported
+    os.environ["ELEVEN_BASE_URL"] = f"{server.url}/elevenlabs/v1"
+
+    from TTS.TikTok import AsyncTikTok, TikTok
+    from TTS.aws_polly import AWSPolly
+    from TTS.async_wrapper import AsyncTTSAdapter
+    from TTS.elevenlabs import elevenlabs
+    from TTS.streamlabs_polly import AsyncStreamlabsPolly, StreamlabsPolly
+    from video_creation.voices import TTSProviders
+
+    broken = check_contract(TTSProviders)
+    print("run contract: " + ("ok" if not broken else "BROKEN " + ", ".join(broken)))
+
+    tiktok, polly = f"{server.url}/tiktok", f"{server.url}/polly/speak"
+    providers = {
+        "TikTok": partial(TikTok, uri_base=tiktok),
+        "TikTok (async)": partial(AsyncTTSAdapter, partial(AsyncTikTok, uri_base=tiktok)),
+        "StreamlabsPolly": partial(StreamlabsPolly, url=polly),
+        "StreamlabsPolly (async)": partial(
+            AsyncTTSAdapter, partial(AsyncStreamlabsPolly, url=polly)
+        ),
+        # botocore adds /v1/speech, with dummy credentials when there is no polly profile
+        "AWSPolly": partial(AWSPolly, endpoint_url=server.url),
+        "ElevenLabs": elevenlabs,
+    }
+    if args.local:
+        providers["espeak"] = TTSProviders["espeak"]
+        providers["pyttsx"] = TTSProviders["pyttsx"]
+    skipped = [name for name in TTSProviders if name not in providers]
+    print("no stand-in, skipped: " + ", ".join(skipped))
+
+    print(
+        f"{'provider':<24} {'workers':>7} {'clips/s':>8} {'p50 (s)':>8} {'p95 (s)':>8} "
+        f"{'MB':>6} {'failed':>6} {'429s':>5} {'500s':>5}"
+    )
+    with tempfile.TemporaryDirectory() as tmp:
+        for name, make_provider in providers.items():
+            for workers in args.concurrency:
+                for key in PROVIDER_KEYS:
+                    settings.config["settings"]["tts"][f"{key}_max_workers"] = workers
+                reset_shared_state()
+                before = dict(server.counters)
+                result = bench(make_provider, workers, args.clips, tmp)
+                print(
+                    f"{name:<24} {workers:>7} {result['clips/s']:>8.2f} {result['p50']:>8.2f} "
+                    f"{result['p95']:>8.2f} {result['bytes'] / 1e6:>6.2f} {result['failed']:>6} "
+                    f"{server.counters['429'] - before['429']:>5} "
+                    f"{server.counters['500'] - before['500']:>5}"
+                )
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
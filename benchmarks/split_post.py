@@ -0,0 +1,113 @@
+"""Benchmarks TTSEngine.split_post against the length of the post.
+
+Run it from the root of the repository:
+
+    python -m benchmarks.split_post [--latency 0.2] [--workers 4]
+
+A fake provider copies a one second mp3 after sleeping for --latency seconds, so the numbers only
+show the cost of the pipeline around the provider: how many ffmpeg and ffprobe processes are
+started, whether by subprocess.run or by ffmpeg-python, and the wall time of splitting,
+synthesizing and concatenating a post. The TTS cache is disabled, so the clips are not probed to
+be cached. --lossless adds the decode of every part to WAV.
+"""
+
+import argparse
+import shutil
+import subprocess
+import tempfile
+import time
+from pathlib import Path
+
+from utils import settings
+
+CLIP = None
+
+
+class FakeProvider:
+    max_chars = 200
+    max_workers = 1
+    latency = 0.0
+    calls = 0
+
+    def run(self, text, filepath, random_voice=False):
+        FakeProvider.calls += 1
+        time.sleep(self.latency)
+        shutil.copyfile(CLIP, filepath)
+
+
+def count_processes():
+    """Counts the ffmpeg and ffprobe processes started from now on, returns the counter.
+
+    subprocess.run and ffmpeg-python both start their processes with subprocess.Popen, so it is
+    counted there.
+    """
+    counter = {"ffmpeg": 0, "ffprobe": 0}
+
+    class CountingPopen(subprocess.Popen):
+        def __init__(self, args, *a, **kw):
+            name = Path(str(args[0] if isinstance(args, (list, tuple)) else args)).stem
+            if name in counter:
+                counter[name] += 1
+            super().__init__(args, *a, **kw)
+
+    subprocess.Popen = CountingPopen
+    return counter
+
+
+def main():
+    global CLIP
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--latency", type=float, default=0.2, help="fake provider latency (s)")
+    parser.add_argument("--workers", type=int, default=4, help="provider max_workers")
+    parser.add_argument("--lossless", action="store_true", help="keep the clips as WAV")
+    parser.add_argument(
+        "--sentences", type=int, nargs="+", default=[3, 15, 30, 75, 150], help="post lengths"
+    )
+    args = parser.parse_args()
+
+    settings.config = {
+        "reddit": {"thread": {"post_lang": ""}},
+        "settings": {
+            "tts": {
+                "random_voice": False,
+                "silence_duration": 0.3,
+                "no_emojis": False,
+                "tts_cache_size": 0,
+                "lossless_audio": args.lossless,
+            }
+        },
+    }
+    from TTS.engine_wrapper import AUDIO_SAMPLE_RATE, TTSEngine
+    from utils.silence import get_silence
+
+    FakeProvider.latency = args.latency
+    FakeProvider.max_workers = args.workers
+    counter = count_processes()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        CLIP = f"{tmp}/clip.mp3"
+        subprocess.run(
+            ["ffmpeg", "-y", "-loglevel", "panic", "-f", "lavfi", "-i", "anullsrc", "-t", "1", CLIP]
+        )
+        print(f"{'chars':>7} {'parts':>6} {'ffmpeg':>7} {'ffprobe':>8} {'wall time (s)':>14}")
+        sentence = "This is a sentence that is long enough to fill a part of the post."
+        for sentences in args.sentences:
+            post = " ".join([sentence] * sentences)
+            engine = TTSEngine(FakeProvider, {"thread_id": f"bench{sentences}"}, path=f"{tmp}/")
+            Path(engine.path).mkdir(parents=True)
+            # cached across runs, not part of the measure
+            get_silence(0.3, sample_rate=AUDIO_SAMPLE_RATE, codec=engine.ext)
+
+            counter.update(ffmpeg=0, ffprobe=0)
+            FakeProvider.calls = 0
+            start = time.perf_counter()
+            engine.split_post(post, 0)
+            elapsed = time.perf_counter() - start
+            print(
+                f"{len(post):>7} {FakeProvider.calls:>6} {counter['ffmpeg']:>7} "
+                f"{counter['ffprobe']:>8} {elapsed:>14.2f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -155,6 +155,7 @@ def get_subreddit_threads(POST_ID: str):
                                     "comment_body": top_level_comment.body,
                                     "comment_url": top_level_comment.permalink,
                                     "comment_id": top_level_comment.id,
+                                    "comment_score": top_level_comment.score,
                                 }
                             )
 
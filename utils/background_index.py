@@ -0,0 +1,138 @@
+import os
+import random
+import re
+import subprocess
+import threading
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from utils.console import print_substep
+from utils.jsonstore import load_json, save_json
+from utils.probe import probe
+
+__all__ = ["BackgroundIndex", "background_index", "pick_start"]
+
+
+class BackgroundIndex:
+    """Persistent metadata of the files in assets/backgrounds.
+
+    Every file is indexed once and again only when its size or mtime changes. Videos get their
+    duration, resolution, fps, keyframes and the motion between consecutive keyframes, which is the
+    scene score of ffmpeg computed on the keyframes only, so indexing does not decode the whole
+    file. Audio files get their duration.
+
+    Args:
+        path (Optional): The JSON file the index is stored in.
+    """
+
+    def __init__(self, path: str = "assets/backgrounds/index.json"):
+        self.path = path
+        self._entries: Optional[Dict[str, dict]] = None
+        self._lock = threading.Lock()
+
+    @property
+    def entries(self) -> Dict[str, dict]:
+        if self._entries is None:
+            self._entries = load_json(self.path)
+        return self._entries
+
+    def save(self):
+        save_json(self.path, self.entries)
+
+    def get(self, path: str) -> dict:
+        """Returns the entry of a background, indexing it first if it is new or has changed"""
+        stat = os.stat(path)
+        key = Path(path).as_posix()
+        with self._lock:
+            entry = self.entries.get(key)
+            if entry and entry["size"] == stat.st_size and entry["mtime"] == stat.st_mtime:
+                return entry
+            print_substep(f"Indexing {Path(path).name}, this is only done once...")
+            entry = {"size": stat.st_size, "mtime": stat.st_mtime, **index_file(path)}
+            self.entries[key] = entry
+            self.save()
+            return entry
+
+
+def index_file(path: str) -> dict:
+    info = probe(path)
+    entry = {"duration": float(info["format"]["duration"])}
+    video = next((s for s in info["streams"] if s.get("codec_type") == "video"), None)
+    if video is None:
+        return entry
+    num, _, den = video.get("avg_frame_rate", "0/1").partition("/")
+    entry["width"] = int(video["width"])
+    entry["height"] = int(video["height"])
+    entry["fps"] = float(num) / float(den) if float(den or 0) else 0.0
+    entry["keyframes"], entry["motion"] = keyframe_motion(path)
+    return entry
+
+
+def keyframe_motion(path: str) -> Tuple[List[float], List[float]]:
+    """Decodes only the keyframes of a video and returns their times and their scene scores.
+
+    motion[i] is the scene score between keyframe i - 1 and keyframe i, 0 for the first one.
+    """
+    output = subprocess.run(
+        [
+            "ffmpeg",
+            "-hide_banner",
+            "-loglevel",
+            "error",
+            "-skip_frame",
+            "nokey",
+            "-i",
+            path,
+            "-map",
+            "0:v:0",
+            "-vf",
+            "scale=160:-2,select='gte(scene,0)',metadata=print:file=-",
+            "-f",
+            "null",
+            "-",
+        ],
+        capture_output=True,
+        text=True,
+        check=True,
+    ).stdout
+    keyframes = [float(t) for t in re.findall(r"pts_time:([\d.]+)", output)]
+    motion = [float(s) for s in re.findall(r"lavfi\.scene_score=([\d.]+)", output)]
+    return keyframes, motion[: len(keyframes)]
+
+
+def pick_start(entry: dict, video_length: float, margin: float = 180) -> Optional[float]:
+    """Picks a keyframe to start a background clip of video_length seconds at.
+
+    Starts within margin seconds of the beginning or the end (the intro and outro, shrunk for short
+    files) are avoided, as well as windows that move less than half as much as the median of the
+    file, so static stretches like menus and loading screens are not picked. Returns None if no
+    keyframe fits.
+    """
+    keyframes, motion = entry.get("keyframes"), entry.get("motion")
+    if not keyframes:
+        return None
+    duration = entry["duration"]
+    while margin > 1 and duration <= video_length + 2 * margin:
+        margin /= 2
+    candidates = [
+        i for i, t in enumerate(keyframes) if margin <= t <= duration - margin - video_length
+    ]
+    if not candidates:
+        candidates = [i for i, t in enumerate(keyframes) if t <= duration - video_length]
+    if not candidates:
+        return None
+
+    def window_motion(i: int) -> float:
+        end = keyframes[i] + video_length
+        scores = [m for t, m in zip(keyframes[i + 1 :], motion[i + 1 :]) if t <= end]
+        return sum(scores) / len(scores) if scores else 0.0
+
+    # a window moving half as much as the typical stretch of the file is considered static
+    threshold = sorted(motion)[len(motion) // 2] / 2 if motion else 0.0
+    moving = [i for i in candidates if window_motion(i) >= threshold]
+    if not moving:
+        moving = sorted(candidates, key=window_motion, reverse=True)[: max(1, len(candidates) // 4)]
+    return keyframes[random.choice(moving)]
+
+
+background_index = BackgroundIndex()
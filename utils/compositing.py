@@ -0,0 +1,88 @@
+import os
+from concurrent.futures import ThreadPoolExecutor
+from itertools import repeat
+from pathlib import Path
+from typing import List, Optional, Sequence
+
+from PIL import Image, ImageDraw, ImageFont
+
+__all__ = ["composite_screenshots", "render_credit"]
+
+
+def _composite(
+    path: str, output_path: str, width: int, canvas_height: int, opacity: Optional[float]
+) -> str:
+    """Resizes one screenshot, bakes the opacity into its alpha and centers it on the canvas"""
+    with Image.open(path) as image:
+        image = image.convert("RGBA")
+        height = round(image.height * width / image.width)
+        image = image.resize((width, height), Image.LANCZOS)
+    if opacity is not None and opacity < 1:
+        image.putalpha(image.getchannel("A").point(lambda a: round(a * opacity)))
+    canvas = Image.new("RGBA", (width, canvas_height), (0, 0, 0, 0))
+    canvas.paste(image, (0, (canvas_height - height) // 2))
+    canvas.save(output_path, compress_level=1)
+    return output_path
+
+
+def composite_screenshots(
+    paths: Sequence[str],
+    width: int,
+    opacity: Optional[float],
+    max_workers: Optional[int] = None,
+) -> List[str]:
+    """Prepares the screenshots so the render only has to blend them.
+
+    Every screenshot is resized to width once, its opacity is applied to its alpha channel and it
+    is centered on a transparent canvas as tall as the tallest one, so all the frames of the image
+    track have the same size and the filter graph never has to be reconfigured. The screenshots are
+    processed by a thread pool, each one is written next to its source with a -composited suffix.
+
+    Args:
+        paths (Sequence[str]): The screenshots
+        width (int): Width of the screenshots in the video
+        opacity (Optional[float]): Opacity of the screenshots, None to keep them opaque
+        max_workers (Optional[int]): How many screenshots are processed at the same time
+
+    Returns:
+        List[str]: The paths of the composited screenshots, in the order of paths
+    """
+    heights = []
+    for path in paths:
+        # only reads the header
+        with Image.open(path) as image:
+            heights.append(round(image.height * width / image.width))
+    output_paths = [str(Path(path).with_name(f"{Path(path).stem}-composited.png")) for path in paths]
+    # Pillow releases the GIL while it resizes and encodes, threads are enough
+    with ThreadPoolExecutor(max_workers=max_workers or os.cpu_count()) as executor:
+        return list(
+            executor.map(
+                _composite,
+                paths,
+                output_paths,
+                repeat(width),
+                repeat(max(heights)),
+                repeat(opacity),
+            )
+        )
+
+
+def render_credit(
+    text: str,
+    output_path: str,
+    fontsize: int = 5,
+    fontfile: str = os.path.join("fonts", "Roboto-Regular.ttf"),
+) -> str:
+    """Renders a line of white text on a transparent image as small as the text.
+
+    Returns:
+        str: output_path
+    """
+    font = ImageFont.truetype(fontfile, fontsize)
+    left, top, right, bottom = ImageDraw.Draw(Image.new("RGBA", (1, 1))).textbbox(
+        (0, 0), text, font=font
+    )
+    image = Image.new("RGBA", (max(1, right - left), max(1, bottom - top)), (0, 0, 0, 0))
+    ImageDraw.Draw(image).text((-left, -top), text, font=font, fill="white")
+    image.save(output_path)
+    return output_path
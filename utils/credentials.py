@@ -0,0 +1,179 @@
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional, Union
+
+from utils.console import print_substep
+from utils.ratelimit import RateLimiter, RateLimitExceeded, get_rate_limiter
+
+__all__ = [
+    "Credential",
+    "CredentialPool",
+    "CredentialRejected",
+    "CredentialsExhausted",
+    "get_credential_pool",
+    "parse_credentials",
+    "report_credential_pools",
+]
+
+
+class CredentialRejected(Exception):
+    """Raised by a provider when the service refuses a credential (bad key, expired session, quota)"""
+
+
+class CredentialsExhausted(Exception):
+    def __init__(self, name: str, count: int):
+        self.name = name
+        self.count = count
+
+    def __str__(self) -> str:
+        return f"All {self.count} {self.name} credentials are quarantined, check them in config.toml"
+
+
+def parse_credentials(value: Union[str, List[str], None]) -> List[str]:
+    """Reads a credential setting, either a TOML list or a comma separated string"""
+    if not value:
+        return []
+    if isinstance(value, str):
+        value = value.split(",")
+    return [str(credential).strip() for credential in value if str(credential).strip()]
+
+
+class Credential:
+    """One account of a provider, with its own rate limiter and health"""
+
+    def __init__(self, value: str, rate_limiter: RateLimiter):
+        self.value = value
+        self.rate_limiter = rate_limiter
+        self.in_flight = 0
+        self.requests = 0
+        self.errors = 0
+        self.rejections = 0  # consecutive, reset by a success
+        self.quarantined_until = 0.0
+
+    @property
+    def label(self) -> str:
+        return f"...{self.value[-4:]}"
+
+    def available(self, now: float) -> bool:
+        return self.quarantined_until <= now
+
+
+class CredentialPool:
+    """Spreads the requests of a provider over several accounts.
+
+    Every credential has its own rate limiter, so the pool scales past the limit of one account.
+    Requests go round robin over the healthy credentials, or to the one with the fewest requests in
+    flight with the least_loaded strategy. A credential that is rejected, or still throttled after
+    its limiter gave up, is quarantined for quarantine seconds, doubling on every consecutive
+    rejection.
+
+    Args:
+        name                  : The name used in the report and the rate limiters.
+        values                : The credentials.
+        strategy (Optional)   : round_robin or least_loaded.
+        quarantine (Optional) : The first quarantine, in seconds.
+        limiter_kwargs        : Passed to the rate limiter of every credential.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        values: List[str],
+        strategy: str = "round_robin",
+        quarantine: float = 300.0,
+        max_quarantine: float = 3600.0,
+        **limiter_kwargs,
+    ):
+        if not values:
+            raise ValueError(f"No {name} credentials are set in config.toml")
+        if strategy not in ("round_robin", "least_loaded"):
+            raise ValueError(f"Unknown credential strategy {strategy}")
+        self.name = name
+        self.strategy = strategy
+        self.quarantine = quarantine
+        self.max_quarantine = max_quarantine
+        # a single account keeps the limiter of the provider, as without a pool
+        self.credentials = [
+            Credential(
+                value,
+                get_rate_limiter(name if len(values) == 1 else f"{name} #{i + 1}", **limiter_kwargs),
+            )
+            for i, value in enumerate(values)
+        ]
+        self._next = 0
+        self._lock = threading.Lock()
+
+    def acquire(self) -> Credential:
+        with self._lock:
+            now = time.monotonic()
+            healthy = [c for c in self.credentials if c.available(now)]
+            if not healthy:
+                raise CredentialsExhausted(self.name, len(self.credentials))
+            if self.strategy == "least_loaded":
+                credential = min(healthy, key=lambda c: (c.in_flight, c.requests))
+            else:
+                credential = self.credentials[self._next % len(self.credentials)]
+                while not credential.available(now):
+                    self._next += 1
+                    credential = self.credentials[self._next % len(self.credentials)]
+                self._next += 1
+            credential.in_flight += 1
+            credential.requests += 1
+            return credential
+
+    def release(self, credential: Credential, error: Optional[BaseException] = None):
+        with self._lock:
+            credential.in_flight -= 1
+            if error is None:
+                credential.rejections = 0
+                return
+            credential.errors += 1
+            if not isinstance(error, (CredentialRejected, RateLimitExceeded)):
+                return
+            credential.rejections += 1
+            delay = min(self.max_quarantine, self.quarantine * 2 ** (credential.rejections - 1))
+            credential.quarantined_until = time.monotonic() + delay
+        print_substep(
+            f"{self.name} credential {credential.label} quarantined for {delay:.0f}s: {error}",
+            style="bold red",
+        )
+
+    @contextmanager
+    def use(self) -> Iterator[Credential]:
+        """Borrows a credential. CredentialRejected and RateLimitExceeded quarantine it"""
+        credential = self.acquire()
+        try:
+            yield credential
+        except BaseException as e:
+            self.release(credential, e)
+            raise
+        self.release(credential)
+
+    def report(self):
+        if len(self.credentials) < 2:
+            return
+        for credential in self.credentials:
+            state = "quarantined" if not credential.available(time.monotonic()) else "healthy"
+            print_substep(
+                f"{self.name} credential {credential.label}: {credential.requests} requests, "
+                f"{credential.errors} errors, {state}",
+                style="bold blue",
+            )
+
+
+credential_pools: Dict[str, CredentialPool] = {}
+_registry_lock = threading.Lock()
+
+
+def get_credential_pool(name: str, values: List[str], **kwargs) -> CredentialPool:
+    """Returns the credential pool of a provider, shared by every thread and instance"""
+    with _registry_lock:
+        if name not in credential_pools:
+            credential_pools[name] = CredentialPool(name, values, **kwargs)
+        return credential_pools[name]
+
+
+def report_credential_pools():
+    for pool in credential_pools.values():
+        pool.report()
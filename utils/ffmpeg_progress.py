@@ -0,0 +1,138 @@
+import threading
+import time
+from typing import Callable, Dict, Iterable, List, Optional
+
+import ffmpeg
+
+from utils.console import print_substep
+
+__all__ = ["ProgressEvent", "run_with_progress", "tqdm_callback", "log_callback"]
+
+
+class ProgressEvent:
+    """One progress report of ffmpeg, sent about twice a second and once when it is done.
+
+    Attributes:
+        frame (int): Frames written so far
+        fps (float): Frames written per second of wall time
+        speed (Optional[float]): Seconds of video written per second of wall time, the realtime
+            factor. None until ffmpeg knows it
+        out_time (float): Seconds of video written so far
+        bitrate (Optional[float]): Bitrate of the output in kbit/s, None until ffmpeg knows it
+        progress (float): Share of duration written, from 0 to 1
+        eta (Optional[float]): Seconds of wall time left, None until something has been written
+        elapsed (float): Seconds of wall time since the start
+        done (bool): Whether this is the last event of the render
+    """
+
+    def __init__(self, values: Dict[str, str], duration: float, elapsed: float):
+        self.frame = int(values.get("frame", 0) or 0)
+        self.fps = _number(values.get("fps")) or 0.0
+        self.speed = _number(values.get("speed", "").rstrip("x"))
+        # out_time_ms is in microseconds as well, older versions only write that one
+        out_time_us = _number(values.get("out_time_us", values.get("out_time_ms")))
+        self.out_time = max(0.0, out_time_us / 1_000_000) if out_time_us else 0.0
+        self.bitrate = _number(values.get("bitrate", "").replace("kbits/s", ""))
+        self.done = values.get("progress") == "end"
+        self.elapsed = elapsed
+        self.progress = 1.0 if self.done else min(1.0, self.out_time / duration if duration else 0)
+        if self.done:
+            self.eta = 0.0
+        elif self.out_time > 0:
+            self.eta = elapsed * (duration - self.out_time) / self.out_time
+        else:
+            self.eta = None
+
+    def __repr__(self) -> str:
+        return f"ProgressEvent({vars(self)})"
+
+
+def _number(value: Optional[str]) -> Optional[float]:
+    """Parses a value of the progress output, which is N/A when it is not known yet"""
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def run_with_progress(
+    stream: ffmpeg,
+    duration: float,
+    callbacks: Iterable[Callable[[ProgressEvent], None]] = (),
+) -> ProgressEvent:
+    """Runs an ffmpeg output and sends its progress to callbacks while it renders.
+
+    ffmpeg writes its progress as key=value lines to its stdout, read here as it comes, so nothing
+    is polled and no file is left behind. stderr is read at the same time so ffmpeg never blocks
+    on a full pipe, and is kept for the error.
+
+    Args:
+        stream (ffmpeg): The output to run, it must not write to stdout itself
+        duration (float): Length of the output in seconds, for the progress and the ETA
+        callbacks (Iterable[Callable[[ProgressEvent], None]]): Called with every event
+
+    Returns:
+        ProgressEvent: The last event, its speed is the realtime factor of the render
+
+    Raises:
+        ffmpeg.Error: If ffmpeg fails
+    """
+    callbacks = list(callbacks)
+    start = time.perf_counter()
+    process = stream.global_args("-progress", "pipe:1", "-nostats").run_async(
+        pipe_stdout=True, pipe_stderr=True
+    )
+    stderr: List[bytes] = []
+    reader = threading.Thread(target=lambda: stderr.append(process.stderr.read()), daemon=True)
+    reader.start()
+
+    event = None
+    values: Dict[str, str] = {}
+    for line in process.stdout:
+        key, _, value = line.decode("utf8", "replace").strip().partition("=")
+        values[key] = value
+        if key == "progress":
+            event = ProgressEvent(values, duration, time.perf_counter() - start)
+            for callback in callbacks:
+                callback(event)
+            values = {}
+    process.stdout.close()
+    reader.join()
+    if process.wait():
+        raise ffmpeg.Error("ffmpeg", None, b"".join(stderr))
+    if event is None or not event.done:
+        # ffmpeg exited without its final report
+        event = ProgressEvent({**values, "progress": "end"}, duration, time.perf_counter() - start)
+        for callback in callbacks:
+            callback(event)
+    return event
+
+
+def tqdm_callback(pbar) -> Callable[[ProgressEvent], None]:
+    """Moves a tqdm bar of total 100 to the progress, with fps, speed and ETA as its postfix"""
+
+    def update(event: ProgressEvent):
+        pbar.update(round(event.progress * 100, 2) - pbar.n)
+        pbar.set_postfix_str(
+            f"{event.fps:.0f} fps, {event.speed or 0:.2f}x"
+            + (f", {event.eta:.0f}s left" if event.eta is not None else ""),
+            refresh=False,
+        )
+
+    return update
+
+
+def log_callback(every: float = 10.0) -> Callable[[ProgressEvent], None]:
+    """Prints the progress at most once every seconds, and the last event"""
+    last = -every
+
+    def log(event: ProgressEvent):
+        nonlocal last
+        if event.done or event.elapsed - last >= every:
+            last = event.elapsed
+            print_substep(
+                f"{event.progress:.0%} - frame {event.frame}, {event.fps:.1f} fps, "
+                f"{event.speed or 0:.2f}x, {event.bitrate or 0:.0f} kbit/s"
+            )
+
+    return log
@@ -0,0 +1,39 @@
+import json
+import os
+import threading
+from pathlib import Path
+from typing import Any, Optional
+
+__all__ = ["load_json", "save_json"]
+
+
+def load_json(path: str) -> dict:
+    """Returns the JSON object stored at path, an empty dict if it is missing or unreadable"""
+    try:
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {}
+
+
+def save_json(path: str, data: Any, lock: Optional[threading.Lock] = None):
+    """Writes data to path as JSON, atomically.
+
+    The file is written under a name private to the thread and then moved over path, so readers
+    and concurrent writers never see half a file.
+
+    Args:
+        path (str): The JSON file
+        data (Any): What to store
+        lock (Optional[threading.Lock]): Held while data is serialized, if other threads change it
+    """
+    if lock is None:
+        text = json.dumps(data, ensure_ascii=False)
+    else:
+        with lock:
+            text = json.dumps(data, ensure_ascii=False)
+    Path(path).parent.mkdir(parents=True, exist_ok=True)
+    tmp = f"{path}.{threading.get_ident()}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        f.write(text)
+    os.replace(tmp, path)
@@ -0,0 +1,68 @@
+import os
+import threading
+import wave
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import ffmpeg
+
+__all__ = ["probe", "probe_many", "duration", "durations"]
+
+# (absolute path, size, mtime) -> ffprobe output, a file that changes gets a new key
+_cache: Dict[Tuple[str, int, int], dict] = {}
+_lock = threading.Lock()
+
+
+def _key(path: str) -> Tuple[str, int, int]:
+    stat = os.stat(path)
+    return os.path.abspath(path), stat.st_size, stat.st_mtime_ns
+
+
+def _read(path: str) -> dict:
+    """Reads the headers of a file, in process for wav and with one ffprobe for anything else"""
+    if path.lower().endswith(".wav"):
+        try:
+            with wave.open(path, "rb") as f:
+                seconds = f.getnframes() / f.getframerate()
+                return {"format": {"duration": str(seconds)}, "streams": []}
+        except (wave.Error, EOFError):
+            pass  # not plain PCM, let ffprobe read it
+    return ffmpeg.probe(path)
+
+
+def probe_many(paths: Sequence[str], max_workers: Optional[int] = None) -> List[dict]:
+    """Returns the ffprobe output (format and streams) of every file.
+
+    Results are memoized by (path, size, mtime), so every file is read once for as long as it does
+    not change, and the files that are not known yet are probed concurrently.
+
+    Args:
+        paths (Sequence[str]): The media files
+        max_workers (Optional[int]): How many files are probed at the same time
+
+    Returns:
+        List[dict]: The probe of every file, in the order of paths
+    """
+    keys = [_key(path) for path in paths]
+    with _lock:
+        missing = {key: path for key, path in zip(keys, paths) if key not in _cache}
+    if missing:
+        with ThreadPoolExecutor(max_workers=max_workers or os.cpu_count()) as executor:
+            results = dict(zip(missing, executor.map(_read, missing.values())))
+        with _lock:
+            _cache.update(results)
+    with _lock:
+        return [_cache[key] for key in keys]
+
+
+def probe(path: str) -> dict:
+    return probe_many([path])[0]
+
+
+def durations(paths: Sequence[str]) -> List[float]:
+    """Returns the duration of every file in seconds, probing the unknown ones together"""
+    return [float(info["format"]["duration"]) for info in probe_many(paths)]
+
+
+def duration(path: str) -> float:
+    return durations([path])[0]
@@ -0,0 +1,194 @@
+import asyncio
+import random
+import threading
+import time
+from typing import Awaitable, Callable, Dict, Mapping, Optional, Tuple
+
+from requests import Response
+
+from utils.console import print_substep
+
+__all__ = ["RateLimiter", "RateLimitExceeded", "get_rate_limiter", "report_rate_limiters"]
+
+
+class RateLimitExceeded(Exception):
+    def __init__(self, name: str, retries: int):
+        self.name = name
+        self.retries = retries
+
+    def __str__(self) -> str:
+        return f"{self.name} is still rate limiting after {self.retries} retries"
+
+
+class RateLimiter:
+    """Adaptive token bucket for the requests sent to one TTS provider.
+
+    Requests take a token before they are sent. The refill rate starts at rate and learns the
+    provider's real limit: it is halved on every 429, grows back slowly on success and is set from
+    the X-RateLimit-Remaining / X-RateLimit-Reset headers when the provider sends them. Throttled
+    requests are retried after the Retry-After or X-RateLimit-Reset time, or after a jittered
+    exponential backoff when the provider doesn't say how long to wait.
+
+    Args:
+        name                  : The name used in the report.
+        rate (Optional)       : The starting number of requests per second.
+        burst (Optional)      : The size of the bucket.
+        max_retries (Optional): How many times a throttled request is retried.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        rate: float = 10.0,
+        burst: float = 4.0,
+        min_rate: float = 0.1,
+        max_rate: float = 50.0,
+        base_delay: float = 1.0,
+        max_delay: float = 60.0,
+        max_retries: int = 6,
+    ):
+        self.name = name
+        self.rate = rate
+        self.burst = burst
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.max_retries = max_retries
+
+        self.tokens = burst
+        self.updated = time.monotonic()
+        self.paused_until = 0.0
+        self._lock = threading.Lock()
+
+        # counters
+        self.requests = 0
+        self.throttled = 0
+        self.retries = 0
+        self.throttled_time = 0.0
+        self.paced_time = 0.0
+
+    def _reserve(self) -> float:
+        """Takes a token and returns how long to wait before the request can be sent"""
+        with self._lock:
+            now = time.monotonic()
+            self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            self.tokens -= 1
+            self.requests += 1
+            wait = max(0.0, -self.tokens / self.rate, self.paused_until - now)
+            self.paced_time += wait
+            return wait
+
+    def count_retry(self):
+        with self._lock:
+            self.retries += 1
+
+    def acquire(self):
+        time.sleep(self._reserve())
+
+    async def acquire_async(self):
+        await asyncio.sleep(self._reserve())
+
+    def update(self, status: int, headers: Mapping[str, str], attempt: int = 0) -> Optional[float]:
+        """Learns from a response. Returns how long to wait before retrying, None if it succeeded"""
+        now = time.time()
+        reset = _number(headers.get("X-RateLimit-Reset"))
+        if reset is not None and reset < 10**9:  # seconds from now instead of a unix timestamp
+            reset += now
+        remaining = _number(headers.get("X-RateLimit-Remaining"))
+        retry_after = _number(headers.get("Retry-After"))
+
+        with self._lock:
+            if reset is not None and remaining is not None:
+                window = max(1.0, reset - now)
+                if remaining > 0:
+                    self.rate = min(self.max_rate, max(self.min_rate, remaining / window))
+                else:
+                    self.paused_until = time.monotonic() + window
+
+            if status != 429:
+                # additive increase, the headers above take precedence when they exist
+                if remaining is None:
+                    self.rate = min(self.max_rate, self.rate + 0.1)
+                return None
+
+            self.throttled += 1
+            self.rate = max(self.min_rate, self.rate / 2)
+            if retry_after is not None:
+                delay = retry_after
+            elif reset is not None:
+                delay = max(0.0, reset - now)
+            else:
+                delay = random.uniform(0, min(self.max_delay, self.base_delay * 2**attempt))
+            self.paused_until = max(self.paused_until, time.monotonic() + delay)
+            self.throttled_time += delay
+            return delay
+
+    def request(self, send: Callable[[], Response]) -> Response:
+        """Sends a requests call through the limiter, retrying it while it is throttled"""
+        for attempt in range(self.max_retries + 1):
+            if attempt:
+                self.count_retry()
+            self.acquire()
+            response = send()
+            delay = self.update(response.status_code, response.headers, attempt)
+            if delay is None:
+                return response
+            # after the last attempt there is nothing left to wait for
+            if attempt < self.max_retries:
+                print_substep(f"{self.name} ratelimit hit. Sleeping for {delay:.1f} seconds.")
+                time.sleep(delay)
+        raise RateLimitExceeded(self.name, self.max_retries)
+
+    async def request_async(
+        self, send: Callable[[], Awaitable[Tuple[int, Mapping[str, str], object]]]
+    ) -> object:
+        """Async version of request. send returns (status, headers, payload), payload is returned"""
+        for attempt in range(self.max_retries + 1):
+            if attempt:
+                self.count_retry()
+            await self.acquire_async()
+            status, headers, payload = await send()
+            delay = self.update(status, headers, attempt)
+            if delay is None:
+                return payload
+            # after the last attempt there is nothing left to wait for
+            if attempt < self.max_retries:
+                print_substep(f"{self.name} ratelimit hit. Sleeping for {delay:.1f} seconds.")
+                await asyncio.sleep(delay)
+        raise RateLimitExceeded(self.name, self.max_retries)
+
+    def report(self):
+        if not self.requests:
+            return
+        print_substep(
+            f"{self.name}: {self.requests} requests, {self.throttled} throttled, {self.retries} retries, "
+            f"{self.throttled_time:.1f}s throttled, {self.paced_time:.1f}s paced, "
+            f"learned rate {self.rate:.2f} req/s",
+            style="bold blue",
+        )
+
+
+def _number(value) -> Optional[float]:
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+rate_limiters: Dict[str, RateLimiter] = {}
+_registry_lock = threading.Lock()
+
+
+def get_rate_limiter(name: str, **kwargs) -> RateLimiter:
+    """Returns the rate limiter of a provider, shared by every thread and instance"""
+    with _registry_lock:
+        if name not in rate_limiters:
+            rate_limiters[name] = RateLimiter(name, **kwargs)
+        return rate_limiters[name]
+
+
+def report_rate_limiters():
+    for limiter in rate_limiters.values():
+        limiter.report()
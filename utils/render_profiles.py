@@ -0,0 +1,123 @@
+"""Encoder settings of the rendered videos, and a calibration of them for the current machine.
+
+Calibrate from the root of the repository:
+
+    python -m utils.render_profiles [--target 1.0] [--seconds 10]
+
+Every profile encodes the same noisy test pattern at the resolution of config.toml (1080x1920
+without one, --width and --height override it). The best quality profile that renders at least
+--target seconds of video per second is the one to put in the render_profile setting.
+"""
+
+import argparse
+import multiprocessing
+import time
+from typing import Dict, Optional, Tuple
+
+import ffmpeg
+import toml
+
+from utils import settings
+
+__all__ = ["PROFILES", "get_profile", "output_options", "calibrate", "pick_profile"]
+
+# x264 settings of each profile, from the fastest to the best quality. A profile sets either a crf
+# or a bitrate, gop is the keyframe interval in seconds. A profile without fps keeps the frame rate
+# of the background and the encoder's keyframe interval. balanced is what was always rendered, 20M
+# at the frame rate of the background
+PROFILES: Dict[str, dict] = {
+    "fast": {"preset": "veryfast", "crf": 26, "gop": 2, "fps": 30},
+    "balanced": {"preset": "medium", "bitrate": "20M", "gop": None, "fps": None},
+    "archive": {"preset": "slow", "bitrate": "20M", "gop": 4, "fps": 60},
+}
+
+
+def get_profile(name: Optional[str] = None) -> dict:
+    """Returns the profile called name, by default the one of the render_profile setting"""
+    if name is None:
+        name = settings.config["settings"].get("render_profile", "balanced")
+    if name not in PROFILES:
+        raise ValueError(f"Unknown render profile {name}, options are: {list(PROFILES)}")
+    return PROFILES[name]
+
+
+def output_options(name: Optional[str] = None) -> dict:
+    """Returns the ffmpeg output options of the video stream for a profile"""
+    profile = get_profile(name)
+    options = {
+        "c:v": "libx264",
+        "preset": profile["preset"],
+        "threads": multiprocessing.cpu_count(),
+    }
+    if profile["fps"]:
+        options["r"] = profile["fps"]
+        options["g"] = profile["fps"] * profile["gop"]
+    if "crf" in profile:
+        options["crf"] = profile["crf"]
+    else:
+        options["b:v"] = profile["bitrate"]
+    return options
+
+
+def calibrate(
+    seconds: float = 10, width: int = 1080, height: int = 1920, source_fps: int = 60
+) -> Dict[str, float]:
+    """Times every profile on a sample and returns their realtime factors.
+
+    Args:
+        seconds (float): Length of the sample in seconds
+        width (int): Width of the sample
+        height (int): Height of the sample
+        source_fps (int): Frame rate of the sample for the profiles that keep the background's
+
+    Returns:
+        Dict[str, float]: Seconds of video rendered per second of wall time, by profile
+    """
+    factors = {}
+    for name, profile in PROFILES.items():
+        # moving noise keeps the encoder about as busy as gameplay footage
+        sample = ffmpeg.input(
+            f"testsrc2=s={width}x{height}:r={profile['fps'] or source_fps}", f="lavfi", t=seconds
+        ).filter("noise", alls=20, allf="t")
+        start = time.perf_counter()
+        sample.output("-", f="null", **output_options(name)).run(quiet=True)
+        factors[name] = seconds / (time.perf_counter() - start)
+    return factors
+
+
+def pick_profile(factors: Dict[str, float], target: float) -> str:
+    """Returns the best quality profile at least target times faster than realtime"""
+    fast_enough = [name for name in PROFILES if factors[name] >= target]
+    return fast_enough[-1] if fast_enough else next(iter(PROFILES))
+
+
+def configured_resolution(config_file: str = "config.toml") -> Tuple[int, int]:
+    """Returns the resolution_w and resolution_h settings, 1080x1920 if they are not set"""
+    try:
+        config = toml.load(config_file)["settings"]
+        return int(config["resolution_w"]), int(config["resolution_h"])
+    except (FileNotFoundError, KeyError, ValueError, toml.TomlDecodeError):
+        return 1080, 1920
+
+
+def main():
+    width, height = configured_resolution()
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--target", type=float, default=1.0, help="minimum realtime factor")
+    parser.add_argument("--seconds", type=float, default=10, help="length of the sample")
+    parser.add_argument("--width", type=int, default=width)
+    parser.add_argument("--height", type=int, default=height)
+    parser.add_argument(
+        "--source-fps", type=int, default=60, help="frame rate of the sample for balanced"
+    )
+    args = parser.parse_args()
+
+    factors = calibrate(args.seconds, args.width, args.height, args.source_fps)
+    print(f"{'profile':<10} {'realtime factor':>16}")
+    for name, factor in factors.items():
+        print(f"{name:<10} {factor:>15.2f}x")
+    print(f'\nrender_profile = "{pick_profile(factors, args.target)}"')
+
+
+if __name__ == "__main__":
+    main()
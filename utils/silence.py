@@ -0,0 +1,66 @@
+import os
+import re
+import threading
+from pathlib import Path
+from typing import List, Tuple
+
+import ffmpeg
+
+_lock = threading.Lock()
+
+
+def get_silence(
+    duration: float,
+    sample_rate: int = 44100,
+    codec: str = "mp3",
+    directory: str = "assets/cache/silence",
+) -> str:
+    """Returns the path of a silent clip, generating it the first time it is needed.
+
+    Clips are kept in assets/cache/silence by (duration, sample rate, codec), so they are shared by
+    every comment, thread and run. They are rendered by ffmpeg's anullsrc source, without going
+    through a Python callback for every sample.
+
+    Args:
+        duration (float): Length of the silence in seconds
+        sample_rate (int): Sample rate of the clip
+        codec (str): Audio format of the clip, also used as the file extension
+
+    Returns:
+        str: Absolute path of the clip
+    """
+    path = os.path.abspath(f"{directory}/silence-{duration:g}s-{sample_rate}hz.{codec}")
+    with _lock:
+        if not os.path.exists(path):
+            Path(directory).mkdir(parents=True, exist_ok=True)
+            tmp = f"{path}.tmp.{codec}"
+            ffmpeg.input(f"anullsrc=r={sample_rate}:cl=mono", f="lavfi", t=duration).output(
+                tmp
+            ).overwrite_output().run(quiet=True)
+            os.replace(tmp, path)
+    return path
+
+
+def detect_silences(
+    path: str, noise: str = "-35dB", min_duration: float = 0.2
+) -> List[Tuple[float, float]]:
+    """Finds the silent stretches of an audio file with ffmpeg's silencedetect filter.
+
+    Args:
+        path (str): The audio file
+        noise (str): Volume under which the audio counts as silence
+        min_duration (float): Shortest silence to report, in seconds
+
+    Returns:
+        List[Tuple[float, float]]: (start, end) of every silence, in seconds
+    """
+    _, err = (
+        ffmpeg.input(path)
+        .filter("silencedetect", noise=noise, d=min_duration)
+        .output("-", format="null")
+        .run(capture_stderr=True)
+    )
+    starts = [float(x) for x in re.findall(r"silence_start: (-?[\d.]+)", err.decode("utf8"))]
+    ends = [float(x) for x in re.findall(r"silence_end: ([\d.]+)", err.decode("utf8"))]
+    # a silence that lasts until the end of the file has no silence_end
+    return [(max(0.0, start), end) for start, end in zip(starts, ends)]
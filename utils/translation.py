@@ -0,0 +1,113 @@
+import hashlib
+import re
+import threading
+from typing import Dict, Iterable, List, Optional
+
+import translators
+
+from utils import settings
+from utils.jsonstore import load_json, save_json
+
+__all__ = ["Translator", "translator", "translate"]
+
+# numbered markers between the texts of a batch, the pattern tolerates the spacing translators add
+SEPARATOR = "\n[[{}]]\n"
+SEPARATOR_REGEX = r"\s*\[\[\s*\d+\s*\]\]\s*"
+
+
+class Translator:
+    """Translation service shared by TTS, the screenshots and the final video.
+
+    Translations are kept in a persistent cache keyed by (text hash, target language), so the title
+    and the comments of a thread are only sent to the translator once. prefetch() translates the
+    missing texts of a thread in as few requests as possible by joining them with numbered markers.
+
+    Args:
+        path (Optional)      : The JSON file the cache is stored in.
+        batch_chars (Optional): The maximum number of characters sent in one request.
+    """
+
+    def __init__(self, path: str = "assets/cache/translations.json", batch_chars: int = 4500):
+        self.path = path
+        self.batch_chars = batch_chars
+        self.requests = 0
+        self._cache: Optional[Dict[str, str]] = None
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(text: str, lang: str) -> str:
+        return f"{lang}:{hashlib.sha256(text.encode('utf-8')).hexdigest()}"
+
+    @property
+    def cache(self) -> Dict[str, str]:
+        if self._cache is None:
+            self._cache = load_json(self.path)
+        return self._cache
+
+    def save(self):
+        save_json(self.path, self.cache, self._lock)
+
+    def request(self, text: str, lang: str) -> str:
+        with self._lock:
+            self.requests += 1
+        return translators.translate_text(text, translator="google", to_language=lang)
+
+    def translate(self, text: str, lang: str) -> str:
+        key = self.key(text, lang)
+        with self._lock:
+            cached = self.cache.get(key)
+        if cached is not None:
+            return cached
+        translated = self.request(text, lang)
+        with self._lock:
+            self.cache[key] = translated
+        self.save()
+        return translated
+
+    def prefetch(self, texts: Iterable[str], lang: str):
+        """Translates every text that is not cached yet, batching them into few requests"""
+        with self._lock:
+            missing = list(
+                dict.fromkeys(
+                    text for text in texts if text and self.key(text, lang) not in self.cache
+                )
+            )
+        if not missing:
+            return
+
+        batch: List[str] = []
+        batch_len = 0
+        for text in missing:
+            if batch and batch_len + len(text) > self.batch_chars:
+                self._translate_batch(batch, lang)
+                batch, batch_len = [], 0
+            batch.append(text)
+            batch_len += len(text) + len(SEPARATOR)
+        self._translate_batch(batch, lang)
+        self.save()
+
+    def _translate_batch(self, texts: List[str], lang: str):
+        if len(texts) == 1:
+            translations = [self.request(texts[0], lang)]
+        else:
+            joined = "".join(
+                (SEPARATOR.format(i) if i else "") + text for i, text in enumerate(texts)
+            )
+            translations = [t.strip() for t in re.split(SEPARATOR_REGEX, self.request(joined, lang))]
+            if len(translations) != len(texts):
+                # the translator mangled a marker, fall back to one request per text
+                translations = [self.request(text, lang) for text in texts]
+        with self._lock:
+            for text, translated in zip(texts, translations):
+                self.cache[self.key(text, lang)] = translated
+
+
+translator = Translator()
+
+
+def translate(text: str, lang: Optional[str] = None) -> str:
+    """Translates text to lang, or to the post_lang setting if lang is not given"""
+    lang = lang or settings.config["reddit"]["thread"]["post_lang"]
+    if not lang:
+        return text
+    return translator.translate(text, lang)
@@ -3,11 +3,13 @@ import random
 import re
 from pathlib import Path
 from random import randrange
-from typing import Any, Tuple, Dict
+from typing import Any, Tuple, Dict, Optional
 
-from moviepy.editor import VideoFileClip, AudioFileClip
+import ffmpeg
+from moviepy.editor import VideoFileClip
 from moviepy.video.io.ffmpeg_tools import ffmpeg_extract_subclip
 from utils import settings
+from utils.background_index import background_index, pick_start
 from utils.console import print_step, print_substep
 import yt_dlp
 
@@ -35,16 +37,23 @@ def load_background_options():
     return background_options
 
 
-def get_start_and_end_times(video_length: int, length_of_clip: int) -> Tuple[int, int]:
+def get_start_and_end_times(
+    video_length: int, length_of_clip: int, index_entry: Optional[dict] = None
+) -> Tuple[int, int]:
     """Generates a random interval of time to be used as the background of the video.
 
     Args:
         video_length (int): Length of the video
         length_of_clip (int): Length of the video to be used as the background
+        index_entry (Optional[dict]): The background index entry of the clip. The interval then
+            starts on a keyframe, away from the intro, the outro and static stretches
 
     Returns:
         tuple[int,int]: Start and end time of the randomized interval
     """
+    start = pick_start(index_entry, video_length) if index_entry else None
+    if start is not None:
+        return start, start + video_length
     initialValue = 180
     # Issue #1649 - Ensures that will be a valid interval in the video
     while int(length_of_clip) <= int(video_length + initialValue):
@@ -122,6 +131,9 @@ def download_background_audio(background_config: Tuple[str, str, str]):
 def chop_background(background_config: Dict[str, Tuple], video_length: int, reddit_object: dict):
     """Generates the background audio and footage to be used in the video and writes it to assets/temp/background.mp3 and assets/temp/background.mp4
 
+    With direct_background, background.mp4 is not written, only its start time is stored in
+    background_config["video_start"].
+
     Args:
         background_config (Dict[str,Tuple]]) : Current background configuration
         video_length (int): Length of the clip where the background footage is to be taken out of
@@ -133,19 +145,29 @@ def chop_background(background_config: Dict[str, Tuple], video_length: int, redd
     else:
         print_step("Finding a spot in the backgrounds audio to chop...✂️")
         audio_choice = f"{background_config['audio'][2]}-{background_config['audio'][1]}"
-        background_audio = AudioFileClip(f"assets/backgrounds/audio/{audio_choice}")
         start_time_audio, end_time_audio = get_start_and_end_times(
-            video_length, background_audio.duration
+            video_length,
+            background_index.get(f"assets/backgrounds/audio/{audio_choice}")["duration"],
         )
-        background_audio = background_audio.subclip(start_time_audio, end_time_audio)
-        background_audio.write_audiofile(f"assets/temp/{id}/background.mp3")
+        # cut by ffmpeg, without decoding the whole background into moviepy
+        ffmpeg.input(
+            f"assets/backgrounds/audio/{audio_choice}",
+            ss=start_time_audio,
+            t=end_time_audio - start_time_audio,
+        ).output(f"assets/temp/{id}/background.mp3").overwrite_output().run(quiet=True)
 
     print_step("Finding a spot in the backgrounds video to chop...✂️")
     video_choice = f"{background_config['video'][2]}-{background_config['video'][1]}"
-    background_video = VideoFileClip(f"assets/backgrounds/video/{video_choice}")
+    # snapped to a keyframe, so the stream copy below starts on a clean frame
+    video_entry = background_index.get(f"assets/backgrounds/video/{video_choice}")
     start_time_video, end_time_video = get_start_and_end_times(
-        video_length, background_video.duration
+        video_length, video_entry["duration"], video_entry
     )
+    # the final render seeks to it directly when direct_background is enabled
+    background_config["video_start"] = start_time_video
+    if settings.config["settings"]["background"].get("direct_background", False):
+        print_substep("Background will be cut in the final render.", style="bold green")
+        return background_config["video"][2]
     # Extract video subclip
     try:
         ffmpeg_extract_subclip(
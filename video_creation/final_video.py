@@ -1,70 +1,36 @@
+import glob
+import math
 import multiprocessing
 import os
 import re
 from os.path import exists  # Needs to be imported specifically
 from typing import Final
-from typing import Tuple, Any, Dict
+from typing import Tuple, Any, Dict, Iterable, List, Callable
 
 import ffmpeg
-import translators
 from PIL import Image
 from rich.console import Console
 from rich.progress import track
 
+from TTS.engine_wrapper import clip_extension, clip_output_options
 from utils.cleanup import cleanup
+from utils.compositing import composite_screenshots, render_credit
+from utils.probe import durations, probe
+from utils.render_profiles import get_profile, output_options
 from utils.console import print_step, print_substep
+from utils.ffmpeg_progress import ProgressEvent, run_with_progress, tqdm_callback
 from utils.thumbnail import create_thumbnail
+from utils.translation import translate
 from utils.videos import save_data
 from utils import settings
 
-import tempfile
 import threading
 import time
+from concurrent.futures import ThreadPoolExecutor
 
 console = Console()
 
 
-class ProgressFfmpeg(threading.Thread):
-    def __init__(self, vid_duration_seconds, progress_update_callback):
-        threading.Thread.__init__(self, name="ProgressFfmpeg")
-        self.stop_event = threading.Event()
-        self.output_file = tempfile.NamedTemporaryFile(mode="w+", delete=False)
-        self.vid_duration_seconds = vid_duration_seconds
-        self.progress_update_callback = progress_update_callback
-
-    def run(self):
-        while not self.stop_event.is_set():
-            latest_progress = self.get_latest_ms_progress()
-            if latest_progress is not None:
-                completed_percent = latest_progress / self.vid_duration_seconds
-                self.progress_update_callback(completed_percent)
-            time.sleep(1)
-
-    def get_latest_ms_progress(self):
-        lines = self.output_file.readlines()
-
-        if lines:
-            for line in lines:
-                if "out_time_ms" in line:
-                    out_time_ms_str = line.split("=")[1].strip()
-                    if out_time_ms_str.isnumeric():
-                        return float(out_time_ms_str) / 1000000.0
-                    else:
-                        # Handle the case when "N/A" is encountered
-                        return None
-        return None
-
-    def stop(self):
-        self.stop_event.set()
-
-    def __enter__(self):
-        self.start()
-        return self
-
-    def __exit__(self, *args, **kwargs):
-        self.stop()
-
-
 def name_normalize(name: str) -> str:
     name = re.sub(r'[?\\"%*:|<>]', "", name)
     name = re.sub(r"( [w,W]\s?\/\s?[o,O,0])", r" without", name)
@@ -76,7 +42,7 @@ def name_normalize(name: str) -> str:
     lang = settings.config["reddit"]["thread"]["post_lang"]
     if lang:
         print_substep("Translating filename...")
-        translated_name = translators.translate_text(name, translator="google", to_language=lang)
+        translated_name = translate(name, lang)
         return translated_name
     else:
         return name
@@ -90,12 +56,7 @@ def prepare_background(reddit_id: str, W: int, H: int) -> str:
         .output(
             output_path,
             an=None,
-            **{
-                "c:v": "h264",
-                "b:v": "20M",
-                "b:a": "192k",
-                "threads": multiprocessing.cpu_count(),
-            },
+            **output_options(),
         )
         .overwrite_output()
     )
@@ -107,6 +68,228 @@ def prepare_background(reddit_id: str, W: int, H: int) -> str:
     return output_path
 
 
+def background_input(
+    reddit_id: str,
+    background_config: Dict[str, Tuple],
+    length: float,
+    W: int,
+    H: int,
+    start: float = 0.0,
+) -> ffmpeg:
+    """Returns the cropped background stream of the final render, from start for length seconds.
+
+    With direct_background the library file is input-seeked to the start picked by
+    chop_background and cropped in the final filter graph, so the background is only encoded once.
+    Otherwise it is read from background_noaudio.mp4, written by prepare_background.
+    """
+    if not settings.config["settings"]["background"].get("direct_background", False):
+        return ffmpeg.input(f"assets/temp/{reddit_id}/background_noaudio.mp4", ss=start, t=length)
+    video_choice = f"{background_config['video'][2]}-{background_config['video'][1]}"
+    return ffmpeg.input(
+        f"assets/backgrounds/video/{video_choice}",
+        ss=background_config["video_start"] + start,
+        t=length,
+    ).filter("crop", f"ih*({W}/{H})", "ih")
+
+
+def render_fps(reddit_id: str, background_config: Dict[str, Tuple]) -> float:
+    """Frame rate of the render: the one of the profile, or of the background if it keeps it"""
+    fps = get_profile()["fps"]
+    if fps:
+        return fps
+    if settings.config["settings"]["background"].get("direct_background", False):
+        video_choice = f"{background_config['video'][2]}-{background_config['video'][1]}"
+        path = f"assets/backgrounds/video/{video_choice}"
+    else:
+        path = f"assets/temp/{reddit_id}/background_noaudio.mp4"
+    video = next(s for s in probe(path)["streams"] if s.get("codec_type") == "video")
+    num, _, den = video["avg_frame_rate"].partition("/")
+    return float(num) / float(den or 1)
+
+
+def video_graph(
+    background: ffmpeg,
+    images: List[Tuple[str, float]],
+    list_path: str,
+    credit: str,
+    W: int,
+    H: int,
+) -> ffmpeg:
+    """Overlays the timed screenshots and the credit on the background, scaled to W x H.
+
+    The screenshots and the credit are prepared by composite_screenshots and render_credit, so
+    the graph only blends them.
+
+    Args:
+        background (ffmpeg): The cropped background stream
+        images (List[Tuple[str, float]]): (path, seconds on screen) of every composited screenshot
+        list_path (str): Where the concat list of the screenshots is written
+        credit (str): The rendered "Background by" image
+    """
+    clip = background.overlay(
+        timed_images(list_path, images),
+        x="(main_w-overlay_w)/2",
+        y="(main_h-overlay_h)/2",
+        eof_action="pass",
+    )
+    # a still image, its only frame is repeated until the end
+    clip = clip.overlay(ffmpeg.input(credit), x="main_w-overlay_w", y="main_h-overlay_h")
+    return clip.filter("scale", W, H)
+
+
+def segment_bounds(durations: List[float], length: float, segments: int) -> List[int]:
+    """Splits the timeline in about segments parts of the same length, at screenshot boundaries.
+
+    Returns:
+        List[int]: The index of the first screenshot of every segment, then len(durations)
+    """
+    starts = [0.0]
+    for duration in durations:
+        starts.append(starts[-1] + duration)
+    bounds = [0]
+    for k in range(1, segments):
+        target = length * k / segments
+        i = min(range(len(durations)), key=lambda i: abs(starts[i] - target))
+        # a segment has at least one screenshot and starts after the previous one
+        if bounds[-1] < i:
+            bounds.append(i)
+    return bounds + [len(durations)]
+
+
+def render_segments(
+    reddit_id: str,
+    background_config: Dict[str, Tuple],
+    images: List[Tuple[str, float]],
+    length: float,
+    W: int,
+    H: int,
+    credit: str,
+    segments: int,
+    callbacks: List[Callable[[ProgressEvent], None]],
+) -> str:
+    """Renders the video in segments at the same time and joins them without re-encoding.
+
+    The timeline is cut at screenshot boundaries rounded to the frame grid, every segment is a
+    separate encode that starts with a keyframe and has an exact number of frames, so the stream
+    copy concat has no gap or duplicate frame at the joins.
+
+    Args:
+        images (List[Tuple[str, float]]): (path, seconds on screen) of every composited screenshot
+        length (float): Length of the video in seconds
+        credit (str): The rendered "Background by" image
+        segments (int): How many segments are rendered at the same time
+        callbacks (List[Callable[[ProgressEvent], None]]): Called with the progress of all the
+            segments together
+
+    Returns:
+        str: The path of the joined video, without audio
+    """
+    fps = render_fps(reddit_id, background_config)
+    bounds = segment_bounds([duration for _, duration in images], length, segments)
+    starts = [0.0]
+    for _, duration in images:
+        starts.append(starts[-1] + duration)
+    # first frame of every segment, the last one ends with the video
+    frames = [round(starts[i] * fps) for i in bounds[:-1]] + [math.ceil(length * fps)]
+    options = {**output_options(), "threads": max(1, multiprocessing.cpu_count() // segments)}
+    latest: Dict[int, ProgressEvent] = {}
+    lock = threading.Lock()
+    render_start = time.perf_counter()
+
+    def report(k: int, event: ProgressEvent):
+        with lock:
+            latest[k] = event
+            events = latest.values()
+            # the segments render at the same time, so their speeds add up
+            combined = {
+                "frame": sum(e.frame for e in events),
+                "fps": sum(e.fps for e in events),
+                "speed": sum(e.speed or 0 for e in events),
+                "out_time_us": sum(e.out_time for e in events) * 1_000_000,
+                "progress": "end" if sum(e.done for e in events) == len(bounds) - 1 else "continue",
+            }
+            event = ProgressEvent(
+                {key: str(value) for key, value in combined.items()},
+                length,
+                time.perf_counter() - render_start,
+            )
+            for callback in callbacks:
+                callback(event)
+
+    def render(k: int) -> str:
+        start, count = frames[k] / fps, frames[k + 1] - frames[k]
+        path = f"assets/temp/{reddit_id}/segment-{k}.mp4"
+        graph = video_graph(
+            background_input(reddit_id, background_config, count / fps + 1, W, H, start=start),
+            images[bounds[k] : bounds[k + 1]],
+            f"assets/temp/{reddit_id}/images-{k}.txt",
+            credit,
+            W,
+            H,
+        )
+        run_with_progress(
+            ffmpeg.output(
+                graph, path, f="mp4", an=None, **options, **{"frames:v": count}
+            ).overwrite_output(),
+            count / fps,
+            [lambda event: report(k, event)],
+        )
+        return path
+
+    list_path = f"assets/temp/{reddit_id}/segments.txt"
+    output_path = f"assets/temp/{reddit_id}/video.mp4"
+    try:
+        # every segment is its own ffmpeg process, the threads only wait for them
+        with ThreadPoolExecutor(max_workers=segments) as executor:
+            paths = list(executor.map(render, range(len(bounds) - 1)))
+
+        with open(list_path, "w") as f:
+            for path in paths:
+                f.write(f"file '{os.path.abspath(path)}'\n")
+        ffmpeg.input(list_path, f="concat", safe=0).output(
+            output_path, c="copy"
+        ).overwrite_output().run(quiet=True)
+    except ffmpeg.Error as e:
+        # the pool has waited for the other segments, none of their files is in use anymore
+        for pattern in ("segment-*.mp4", "images-*.txt"):
+            for path in glob.glob(f"assets/temp/{reddit_id}/{pattern}"):
+                os.remove(path)
+        print((e.stderr or b"").decode("utf8"))
+        exit(1)
+    return output_path
+
+
+def timed_images(list_path: str, images: Iterable[Tuple[str, float]]) -> ffmpeg:
+    """Returns one video stream showing every image for its duration, one after the other.
+
+    The images go through ffmpeg's concat demuxer, so the render has a single overlay whatever the
+    number of screenshots, instead of one overlay with its own enable expression per screenshot.
+    They must all have the same size, see composite_screenshots: ffmpeg reconfigures the whole
+    filter graph every time the size of the frames changes.
+
+    Args:
+        list_path (str): Where the concat list is written
+        images (Iterable[Tuple[str, float]]): (path, seconds on screen) of every image, in order
+
+    Raises:
+        ValueError: If the images do not all have the same size
+    """
+    images = list(images)
+    sizes = set()
+    for path, _ in images:
+        with Image.open(path) as image:  # only reads the header
+            sizes.add(image.size)
+    if len(sizes) > 1:
+        raise ValueError(f"The images of a timed track must have the same size, got {sizes}")
+    with open(list_path, "w") as f:
+        f.write("ffconcat version 1.0\n")
+        for path, duration in images:
+            f.write(f"file '{os.path.abspath(path)}'\nduration {duration:.6f}\n")
+        # the demuxer only applies the duration of an entry that has a next one
+        f.write(f"file '{os.path.abspath(path)}'\n")
+    return ffmpeg.input(list_path, f="concat", safe=0)
+
+
 def merge_background_audio(audio: ffmpeg, reddit_id: str):
     """Gather an audio and merge with assets/backgrounds/background.mp3
     Args:
@@ -132,6 +315,7 @@ def make_final_video(
     length: int,
     reddit_obj: dict,
     background_config: Dict[str, Tuple],
+    progress_callbacks: Iterable[Callable[[ProgressEvent], None]] = (),
 ):
     """Gathers audio clips, gathers all screenshots, stitches them together and saves the final video to assets/temp
     Args:
@@ -139,6 +323,8 @@ def make_final_video(
         length (int): Length of the video
         reddit_obj (dict): The reddit object that contains the posts to read.
         background_config (Tuple[str, str, str, Any]): The background config to use.
+        progress_callbacks (Iterable[Callable[[ProgressEvent], None]]): Also called with the
+            progress of the render, next to the progress bar
     """
     # settings values
     W: Final[int] = int(settings.config["settings"]["resolution_w"])
@@ -153,117 +339,81 @@ def make_final_video(
         and settings.config["settings"]["background"]["background_audio_volume"] != 0
     )
 
+    # wav when lossless_audio is on, so the audio is only lossy-encoded once, in the final mux
+    ext = clip_extension()
+
     print_step("Creating the final video 🎥")
 
-    background_clip = ffmpeg.input(prepare_background(reddit_id, W=W, H=H))
+    if not settings.config["settings"]["background"].get("direct_background", False):
+        prepare_background(reddit_id, W=W, H=H)
 
     # Gather all audio clips
     audio_clips = list()
-    if number_of_clips == 0 and settings.config["settings"]["storymode"] == "false":
+    if number_of_clips == 0 and not settings.config["settings"]["storymode"]:
         print(
             "No audio clips to gather. Please use a different TTS or post."
         )  # This is to fix the TypeError: unsupported operand type(s) for +: 'int' and 'NoneType'
         exit()
     if settings.config["settings"]["storymode"]:
         if settings.config["settings"]["storymodemethod"] == 0:
-            audio_clips = [ffmpeg.input(f"assets/temp/{reddit_id}/mp3/title.mp3")]
-            audio_clips.insert(1, ffmpeg.input(f"assets/temp/{reddit_id}/mp3/postaudio.mp3"))
+            audio_clips = [ffmpeg.input(f"assets/temp/{reddit_id}/mp3/title.{ext}")]
+            audio_clips.insert(1, ffmpeg.input(f"assets/temp/{reddit_id}/mp3/postaudio.{ext}"))
         elif settings.config["settings"]["storymodemethod"] == 1:
             audio_clips = [
-                ffmpeg.input(f"assets/temp/{reddit_id}/mp3/postaudio-{i}.mp3")
+                ffmpeg.input(f"assets/temp/{reddit_id}/mp3/postaudio-{i}.{ext}")
                 for i in track(range(number_of_clips + 1), "Collecting the audio files...")
             ]
-            audio_clips.insert(0, ffmpeg.input(f"assets/temp/{reddit_id}/mp3/title.mp3"))
+            audio_clips.insert(0, ffmpeg.input(f"assets/temp/{reddit_id}/mp3/title.{ext}"))
 
     else:
         audio_clips = [
-            ffmpeg.input(f"assets/temp/{reddit_id}/mp3/{i}.mp3") for i in range(number_of_clips)
+            ffmpeg.input(f"assets/temp/{reddit_id}/mp3/{i}.{ext}") for i in range(number_of_clips)
         ]
-        audio_clips.insert(0, ffmpeg.input(f"assets/temp/{reddit_id}/mp3/title.mp3"))
+        audio_clips.insert(0, ffmpeg.input(f"assets/temp/{reddit_id}/mp3/title.{ext}"))
 
-        audio_clips_durations = [
-            float(ffmpeg.probe(f"assets/temp/{reddit_id}/mp3/{i}.mp3")["format"]["duration"])
-            for i in range(number_of_clips)
-        ]
-        audio_clips_durations.insert(
-            0,
-            float(ffmpeg.probe(f"assets/temp/{reddit_id}/mp3/title.mp3")["format"]["duration"]),
+        # the title and every comment are probed together, and only once
+        audio_clips_durations = durations(
+            [f"assets/temp/{reddit_id}/mp3/title.{ext}"]
+            + [f"assets/temp/{reddit_id}/mp3/{i}.{ext}" for i in range(number_of_clips)]
         )
     audio_concat = ffmpeg.concat(*audio_clips, a=1, v=0)
     ffmpeg.output(
-        audio_concat, f"assets/temp/{reddit_id}/audio.mp3", **{"b:a": "192k"}
+        audio_concat, f"assets/temp/{reddit_id}/audio.{ext}", **clip_output_options()
     ).overwrite_output().run(quiet=True)
 
     console.log(f"[bold green] Video Will Be: {length} Seconds Long")
 
-    screenshot_width = int((W * 45) // 100)
-    audio = ffmpeg.input(f"assets/temp/{reddit_id}/audio.mp3")
+    audio = ffmpeg.input(f"assets/temp/{reddit_id}/audio.{ext}")
     final_audio = merge_background_audio(audio, reddit_id)
 
-    image_clips = list()
-
-    image_clips.insert(
-        0,
-        ffmpeg.input(f"assets/temp/{reddit_id}/png/title.png")["v"].filter(
-            "scale", screenshot_width, -1
-        ),
-    )
-
-    current_time = 0
+    # every screenshot is shown for exactly the length of its audio clip
     if settings.config["settings"]["storymode"]:
-        audio_clips_durations = [
-            float(
-                ffmpeg.probe(f"assets/temp/{reddit_id}/mp3/postaudio-{i}.mp3")["format"]["duration"]
-            )
-            for i in range(number_of_clips)
-        ]
-        audio_clips_durations.insert(
-            0,
-            float(ffmpeg.probe(f"assets/temp/{reddit_id}/mp3/title.mp3")["format"]["duration"]),
+        audio_clips_durations = durations(
+            [f"assets/temp/{reddit_id}/mp3/title.{ext}"]
+            + [f"assets/temp/{reddit_id}/mp3/postaudio-{i}.{ext}" for i in range(number_of_clips)]
         )
         if settings.config["settings"]["storymodemethod"] == 0:
-            image_clips.insert(
-                1,
-                ffmpeg.input(f"assets/temp/{reddit_id}/png/story_content.png").filter(
-                    "scale", screenshot_width, -1
-                ),
-            )
-            background_clip = background_clip.overlay(
-                image_clips[0],
-                enable=f"between(t,{current_time},{current_time + audio_clips_durations[0]})",
-                x="(main_w-overlay_w)/2",
-                y="(main_h-overlay_h)/2",
-            )
-            current_time += audio_clips_durations[0]
-        elif settings.config["settings"]["storymodemethod"] == 1:
-            for i in track(range(0, number_of_clips + 1), "Collecting the image files..."):
-                image_clips.append(
-                    ffmpeg.input(f"assets/temp/{reddit_id}/png/img{i}.png")["v"].filter(
-                        "scale", screenshot_width, -1
-                    )
-                )
-                background_clip = background_clip.overlay(
-                    image_clips[i],
-                    enable=f"between(t,{current_time},{current_time + audio_clips_durations[i]})",
-                    x="(main_w-overlay_w)/2",
-                    y="(main_h-overlay_h)/2",
-                )
-                current_time += audio_clips_durations[i]
+            images = [f"assets/temp/{reddit_id}/png/title.png"]
+        else:
+            images = [f"assets/temp/{reddit_id}/png/title.png"] + [
+                f"assets/temp/{reddit_id}/png/img{i}.png" for i in range(number_of_clips)
+            ]
     else:
-        for i in range(0, number_of_clips + 1):
-            image_clips.append(
-                ffmpeg.input(f"assets/temp/{reddit_id}/png/comment_{i}.png")["v"].filter(
-                    "scale", screenshot_width, -1
-                )
-            )
-            image_overlay = image_clips[i].filter("colorchannelmixer", aa=opacity)
-            background_clip = background_clip.overlay(
-                image_overlay,
-                enable=f"between(t,{current_time},{current_time + audio_clips_durations[i]})",
-                x="(main_w-overlay_w)/2",
-                y="(main_h-overlay_h)/2",
-            )
-            current_time += audio_clips_durations[i]
+        images = [f"assets/temp/{reddit_id}/png/title.png"] + [
+            f"assets/temp/{reddit_id}/png/comment_{i}.png" for i in range(number_of_clips)
+        ]
+
+    # the story mode screenshots stay opaque
+    if settings.config["settings"]["storymode"]:
+        opacity = None
+    # scale, opacity and credit are baked into the images once instead of on every frame
+    screenshots = list(
+        zip(composite_screenshots(images, int((W * 45) // 100), opacity), audio_clips_durations)
+    )
+    credit = render_credit(
+        f"Background by {background_config['video'][2]}",
+        f"assets/temp/{reddit_id}/png/credit.png",
+    )
 
     title = re.sub(r"[^\w\s-]", "", reddit_obj["thread_title"])
     idx = re.sub(r"[^\w\s-]", "", reddit_obj["thread_id"])
@@ -315,88 +465,94 @@ def make_final_video(
             thumbnailSave.save(f"./assets/temp/{reddit_id}/thumbnail.png")
             print_substep(f"Thumbnail - Building Thumbnail in assets/temp/{reddit_id}/thumbnail.png")
 
-    text = f"Background by {background_config['video'][2]}"
-    background_clip = ffmpeg.drawtext(
-        background_clip,
-        text=text,
-        x=f"(w-text_w)",
-        y=f"(h-text_h)",
-        fontsize=5,
-        fontcolor="White",
-        fontfile=os.path.join("fonts", "Roboto-Regular.ttf"),
-    )
-    background_clip = background_clip.filter("scale", W, H)
     print_step("Rendering the video 🎥")
     from tqdm import tqdm
 
-    pbar = tqdm(total=100, desc="Progress: ", bar_format="{l_bar}{bar}", unit=" %")
-
-    def on_update_example(progress) -> None:
-        status = round(progress * 100, 2)
-        old_percentage = pbar.n
-        pbar.update(status - old_percentage)
+    pbar = tqdm(total=100, desc="Progress: ", bar_format="{l_bar}{bar}{postfix}", unit=" %")
+    callbacks = [tqdm_callback(pbar), *progress_callbacks]
+    render_start = time.perf_counter()
 
     defaultPath = f"results/{subreddit}"
-    with ProgressFfmpeg(length, on_update_example) as progress:
-        path = defaultPath + f"/{filename}"
-        path = (
-            path[:251] + ".mp4"
-        )  # Prevent a error by limiting the path length, do not change this.
+    path = defaultPath + f"/{filename}"
+    path = path[:251] + ".mp4"  # Prevent a error by limiting the path length, do not change this.
+    segments = int(settings.config["settings"].get("render_segments", 1))
+    if segments > 1:
+        video_path = render_segments(
+            reddit_id,
+            background_config,
+            screenshots,
+            length,
+            W,
+            H,
+            credit,
+            segments,
+            callbacks,
+        )
+        # the segments are joined already, only the audio is encoded
         try:
             ffmpeg.output(
-                background_clip,
+                ffmpeg.input(video_path)["v"],
                 final_audio,
                 path,
                 f="mp4",
-                **{
-                    "c:v": "h264",
-                    "b:v": "20M",
-                    "b:a": "192k",
-                    "threads": multiprocessing.cpu_count(),
-                },
-            ).overwrite_output().global_args("-progress", progress.output_file.name).run(
-                quiet=True,
-                overwrite_output=True,
-                capture_stdout=False,
-                capture_stderr=False,
+                **{"c:v": "copy", "b:a": "192k"},
+            ).overwrite_output().run(quiet=True)
+        except ffmpeg.Error as e:
+            print(e.stderr.decode("utf8"))
+            exit(1)
+    else:
+        background_clip = video_graph(
+            background_input(reddit_id, background_config, length, W, H),
+            screenshots,
+            f"assets/temp/{reddit_id}/images.txt",
+            credit,
+            W,
+            H,
+        )
+        try:
+            run_with_progress(
+                ffmpeg.output(
+                    background_clip,
+                    final_audio,
+                    path,
+                    f="mp4",
+                    **output_options(),
+                    **{"b:a": "192k"},
+                ).overwrite_output(),
+                length,
+                callbacks,
             )
         except ffmpeg.Error as e:
             print(e.stderr.decode("utf8"))
             exit(1)
-    old_percentage = pbar.n
-    pbar.update(100 - old_percentage)
+    pbar.update(100 - pbar.n)
+    pbar.close()
+    elapsed = time.perf_counter() - render_start
+    # the realtime factor of the whole render, with the joins and the audio
+    print_substep(
+        f"Rendered {length}s of video in {elapsed:.1f}s, {length / elapsed:.2f}x realtime "
+        f"({settings.config['settings'].get('render_profile', 'balanced')} profile, "
+        f"{segments} segment{'s' if segments > 1 else ''})"
+    )
     if allowOnlyTTSFolder:
+        video_path = path
         path = defaultPath + f"/OnlyTTS/{filename}"
         path = (
             path[:251] + ".mp4"
         )  # Prevent a error by limiting the path length, do not change this.
         print_step("Rendering the Only TTS Video 🎥")
-        with ProgressFfmpeg(length, on_update_example) as progress:
-            try:
-                ffmpeg.output(
-                    background_clip,
-                    audio,
-                    path,
-                    f="mp4",
-                    **{
-                        "c:v": "h264",
-                        "b:v": "20M",
-                        "b:a": "192k",
-                        "threads": multiprocessing.cpu_count(),
-                    },
-                ).overwrite_output().global_args("-progress", progress.output_file.name).run(
-                    quiet=True,
-                    overwrite_output=True,
-                    capture_stdout=False,
-                    capture_stderr=False,
-                )
-            except ffmpeg.Error as e:
-                print(e.stderr.decode("utf8"))
-                exit(1)
-
-        old_percentage = pbar.n
-        pbar.update(100 - old_percentage)
-    pbar.close()
+        # the video is the same, copy it from the main output and only encode the TTS audio
+        try:
+            ffmpeg.output(
+                ffmpeg.input(video_path)["v"],
+                audio,
+                path,
+                f="mp4",
+                **{"c:v": "copy", "b:a": "192k"},
+            ).overwrite_output().run(quiet=True)
+        except ffmpeg.Error as e:
+            print(e.stderr.decode("utf8"))
+            exit(1)
     save_data(subreddit, filename + ".mp4", title, idx, background_config["video"][2])
     print_step("Removing temporary files 🗑")
     cleanups = cleanup(reddit_id)
@@ -1,14 +1,18 @@
+from functools import partial
 from typing import Tuple
 
 from rich.console import Console
 
 from TTS.GTTS import GTTS
-from TTS.TikTok import TikTok
+from TTS.TikTok import AsyncTikTok, TikTok
+from TTS.async_wrapper import AsyncTTSAdapter
 from TTS.aws_polly import AWSPolly
 from TTS.engine_wrapper import TTSEngine
+from TTS.espeak import espeak
 from TTS.pyttsx import pyttsx
+from TTS.router import TTSRouter
 from TTS.elevenlabs import elevenlabs
-from TTS.streamlabs_polly import StreamlabsPolly
+from TTS.streamlabs_polly import AsyncStreamlabsPolly, StreamlabsPolly
 from utils import settings
 from utils.console import print_table, print_step
 
@@ -21,6 +25,13 @@ TTSProviders = {
     "TikTok": TikTok,
     "pyttsx": pyttsx,
     "ElevenLabs": elevenlabs,
+    "espeak": espeak,
+}
+
+# providers that can send their requests from one event loop, used when async_http is enabled
+AsyncTTSProviders = {
+    TikTok: AsyncTikTok,
+    StreamlabsPolly: AsyncStreamlabsPolly,
 }
 
 
@@ -36,7 +47,9 @@ def save_text_to_mp3(reddit_obj) -> Tuple[int, int]:
 
     voice = settings.config["settings"]["tts"]["voice_choice"]
     if str(voice).casefold() in map(lambda _: _.casefold(), TTSProviders):
-        text_to_mp3 = TTSEngine(get_case_insensitive_key_value(TTSProviders, voice), reddit_obj)
+        text_to_mp3 = TTSEngine(
+            get_tts_module(get_case_insensitive_key_value(TTSProviders, voice)), reddit_obj
+        )
     else:
         while True:
             print_step("Please choose one of the following TTS providers: ")
@@ -45,7 +58,9 @@ def save_text_to_mp3(reddit_obj) -> Tuple[int, int]:
             if choice.casefold() in map(lambda _: _.casefold(), TTSProviders):
                 break
             print("Unknown Choice")
-        text_to_mp3 = TTSEngine(get_case_insensitive_key_value(TTSProviders, choice), reddit_obj)
+        text_to_mp3 = TTSEngine(
+            get_tts_module(get_case_insensitive_key_value(TTSProviders, choice)), reddit_obj
+        )
     return text_to_mp3.run()
 
 
@@ -54,3 +69,25 @@ def get_case_insensitive_key_value(input_dict, key):
         (value for dict_key, value in input_dict.items() if dict_key.lower() == key.lower()),
         None,
     )
+
+
+def get_tts_module(provider):
+    """Returns the TTS module TTSEngine should use for the chosen provider.
+
+    The provider is wrapped in its async variant if async_http is enabled, and routed together with
+    the hedge_providers if any are set.
+    """
+    providers = [provider]
+    for name in str(settings.config["settings"]["tts"].get("hedge_providers", "")).split(","):
+        fallback = get_case_insensitive_key_value(TTSProviders, name.strip())
+        if fallback is not None and fallback not in providers:
+            providers.append(fallback)
+
+    if settings.config["settings"]["tts"].get("async_http", False):
+        providers = [
+            partial(AsyncTTSAdapter, AsyncTTSProviders[p]) if p in AsyncTTSProviders else p
+            for p in providers
+        ]
+    if len(providers) > 1:
+        return partial(TTSRouter, providers)
+    return providers[0]